@@ -0,0 +1,317 @@
+"""Benchmarks of fixup, breakdown and load paths, on the test models
+
+Run from the repository root, i.e.
+
+    python -m benchmarks.run --scales 1000 10000 --output results.json
+    python -m benchmarks.run --compare results.json
+
+Every case is run on a new set of fixture uppers with a fixed seed, and timed on its own,
+without the setup it needs. Peak memory is measured with tracemalloc in a separate run of each case,
+as tracing slows everything down.
+"""
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+
+import argparse
+from collections import OrderedDict
+import gc
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+from timeit import default_timer
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from sqlalchemy import create_engine
+
+from fixtureupper.register import UpperRegister
+from tests.models import _Base, Article, Author, CoWrite, Draft
+
+
+DEFAULT_SCALES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+
+CASES = OrderedDict()
+
+
+def case(name):
+    """Register benchmark case, a function of scale returning (function to time, number of fixtures)"""
+    def decorator(fn):
+        CASES[name] = fn
+        return fn
+
+    return decorator
+
+
+def get_fixture_upper(seed='benchmark', author_defaults=None):
+    FixtureUpper = UpperRegister('SqlAlchemyModel')
+
+    class AuthorFixtureUpper(FixtureUpper):
+        model = Author
+        defaults = author_defaults or {}
+
+    class ArticleFixtureUpper(FixtureUpper):
+        model = Article
+        defaults = {}
+
+    class DraftFixtureUpper(FixtureUpper):
+        model = Draft
+        defaults = {}
+
+    class CoWriteFixtureUpper(FixtureUpper):
+        model = CoWrite
+        defaults = {}
+
+    return FixtureUpper(start_id=1, seed=seed)
+
+
+def fixup_dataset(m_fu, scale):
+    """Fixup scale fixtures, a tenth of them authors and the rest articles written by them"""
+    authors = m_fu.get_upper('Author').fixup_many(max(scale // 10, 1), data={'name': 'Author'})
+    m_fu.get_upper('Article').fixup_many(scale - len(authors), data={
+        'title': lambda self, fixture, k: 'Title %s' % fixture.id,
+        'is_visible': True,
+        'author': lambda self, fixture, k: self.random.choice(authors),
+    })
+    return m_fu.get_all_fixtures()
+
+
+@case('fixup_static')
+def fixup_static(scale):
+    au_fu = get_fixture_upper().get_upper('Author')
+    return lambda: au_fu.fixup_many(scale, data={'name': 'Author', 'alias': 'Alias'}), scale
+
+
+@case('fixup_generated')
+def fixup_generated(scale):
+    au_fu = get_fixture_upper().get_upper('Author')
+    data = {
+        'name': lambda self, fixture, k: 'Author %s' % fixture.id,
+        'alias': lambda self, fixture, k: 'Alias %s' % self.randint(0, 10 ** 9),
+    }
+    return lambda: au_fu.fixup_many(scale, data=data), scale
+
+
+@case('fixup_static_defaults')
+def fixup_static_defaults(scale):
+    au_fu = get_fixture_upper(author_defaults={'name': 'Author', 'alias': 'Alias'}).get_upper('Author')
+    # One single_fixup per fixture, applying class defaults
+    return lambda: au_fu.fixup([{} for _ in range(scale)]), scale
+
+
+@case('fixup_generated_defaults')
+def fixup_generated_defaults(scale):
+    au_fu = get_fixture_upper(author_defaults={
+        'name': lambda self, fixture, k: 'Author %s' % fixture.id,
+        'alias': lambda self, fixture, k: 'Alias %s' % self.randint(0, 10 ** 9),
+    }).get_upper('Author')
+    return lambda: au_fu.fixup([{} for _ in range(scale)]), scale
+
+
+@case('fixup_relations')
+def fixup_relations(scale):
+    m_fu = get_fixture_upper()
+    ar_fu = m_fu.get_upper('Article')
+    co_fu = m_fu.get_upper('CoWrite')
+    co_fu.generated_field_order = ['article', 'author']
+
+    def run():
+        fixup_dataset(m_fu, scale // 2)
+        # Co-writes of random articles and authors, each setting two relations and their backrefs
+        co_fu.fixup_many(scale - len(m_fu.get_all_fixtures()), data={
+            'article': lambda self, fixture, k: self.random.choice(ar_fu.fixtures),
+            'author': lambda self, fixture, k: self.random.choice(fixture.article.author.articles).author,
+        })
+
+    return run, scale
+
+
+@case('breakdown_to_json')
+def breakdown_to_json(scale):
+    m_fu = get_fixture_upper()
+    fixtures = fixup_dataset(m_fu, scale)
+    return lambda: m_fu.breakdown_to_json(fixtures), scale
+
+
+@case('breakdown_to_sql')
+def breakdown_to_sql(scale):
+    m_fu = get_fixture_upper()
+    fixtures = fixup_dataset(m_fu, scale)
+    return lambda: m_fu.breakdown_to_sql(fixtures), scale
+
+
+@case('fixup_from_json')
+def fixup_from_json(scale):
+    m_fu = get_fixture_upper()
+    json_str = m_fu.breakdown_to_json(fixup_dataset(m_fu, scale))
+
+    m_fu = get_fixture_upper()
+    return lambda: m_fu.fixup_from_json(json_str), scale
+
+
+@case('read_json_breakdown')
+def read_json_breakdown(scale, tmpdir=None):
+    m_fu = get_fixture_upper()
+    m_fu.print_json_breakdown(tmpdir, 'breakdown.json', fixup_dataset(m_fu, scale))
+
+    m_fu = get_fixture_upper()
+    return lambda: m_fu.read_json_breakdown(os.path.join(tmpdir, 'breakdown.json')), scale
+
+
+@case('print_sharded_breakdown')
+def print_sharded_breakdown(scale, tmpdir=None):
+    m_fu = get_fixture_upper()
+    fixtures = fixup_dataset(m_fu, scale)
+    savedir = os.path.join(tmpdir, 'shards')
+    return lambda: m_fu.print_sharded_breakdown(savedir, fixtures, rows_per_shard=max(scale // 8, 1)), scale
+
+
+@case('load_fixtures')
+def load_fixtures(scale):
+    m_fu = get_fixture_upper()
+    fixtures = fixup_dataset(m_fu, scale)
+    engine = create_engine('sqlite://')
+    _Base.metadata.create_all(engine)
+    return lambda: m_fu.load_fixtures(engine, fixtures), scale
+
+
+def setup_case(name, scale, tmpdir):
+    if name in ('read_json_breakdown', 'print_sharded_breakdown'):
+        return CASES[name](scale, tmpdir=tmpdir)
+    return CASES[name](scale)
+
+
+def time_case(name, scale, tmpdir):
+    fn, count = setup_case(name, scale, tmpdir)
+    gc.collect()
+
+    start = default_timer()
+    fn()
+    return default_timer() - start, count
+
+
+def measure_peak_memory(name, scale, tmpdir):
+    if tracemalloc is None:
+        return None
+
+    fn, count = setup_case(name, scale, tmpdir)
+    gc.collect()
+
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmarks(cases, scales, repeat=1, memory=True, log=None):
+    results = []
+    tmpdir = tempfile.mkdtemp()
+
+    try:
+        for scale in scales:
+            for name in cases:
+                # Best of repeated runs, as noise only ever makes runs slower
+                seconds, count = min(time_case(name, scale, tmpdir) for _ in range(repeat))
+                result = OrderedDict([
+                    ('case', name),
+                    ('scale', scale),
+                    ('fixtures', count),
+                    ('seconds', seconds),
+                    ('fixtures_per_second', count / seconds if seconds else None),
+                    ('peak_memory_bytes', measure_peak_memory(name, scale, tmpdir) if memory else None),
+                ])
+                results.append(result)
+
+                if log:
+                    log(result)
+    finally:
+        shutil.rmtree(tmpdir)
+
+    return results
+
+
+def get_environment():
+    return OrderedDict([
+        ('python', platform.python_version()),
+        ('implementation', platform.python_implementation()),
+        ('platform', platform.platform()),
+    ])
+
+
+def compare_results(results, baseline):
+    """Get (case, scale, throughput ratio, peak memory ratio) of results against baseline results"""
+    baseline = {(r['case'], r['scale']): r for r in baseline}
+    comparison = []
+
+    for result in results:
+        base = baseline.get((result['case'], result['scale']))
+        if not base:
+            continue
+
+        def _ratio(key):
+            if result[key] and base[key]:
+                return result[key] / base[key]
+            return None
+
+        comparison.append((
+            result['case'], result['scale'], _ratio('fixtures_per_second'), _ratio('peak_memory_bytes'),
+        ))
+
+    return comparison
+
+
+def format_result(result):
+    memory = result['peak_memory_bytes']
+    return '%-20s %9d fixtures %10.3fs %12.0f fixtures/s %s' % (
+        result['case'],
+        result['fixtures'],
+        result['seconds'],
+        result['fixtures_per_second'] or 0,
+        '%10.1f MiB peak' % (memory / 2 ** 20) if memory is not None else '',
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES)
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--repeat', type=int, default=1, help='time every case this many times, keep the fastest')
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='skip peak memory runs')
+    parser.add_argument('--output', help='write results as json to this path')
+    parser.add_argument('--compare', help='compare results with json results of an earlier run')
+    args = parser.parse_args(argv)
+
+    def log(result):
+        print(format_result(result), file=sys.stderr)
+
+    results = run_benchmarks(args.cases, args.scales, repeat=args.repeat, memory=args.memory, log=log)
+    report = OrderedDict([('environment', get_environment()), ('results', results)])
+
+    if args.output:
+        with open(args.output, 'w') as fout:
+            json.dump(report, fout, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+    if args.compare:
+        with open(args.compare, 'r') as fin:
+            baseline = json.load(fin)['results']
+
+        for name, scale, throughput, memory in compare_results(results, baseline):
+            print('%-20s %9d throughput x%s, peak memory x%s' % (
+                name,
+                scale,
+                '%.2f' % throughput if throughput else '-',
+                '%.2f' % memory if memory else '-',
+            ), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Loading of fixtures through asyncio SqlAlchemy engines, needs python 3 and SqlAlchemy 1.4 or later"""
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+
+async def _load_batches(connection, batches):
+    loop = asyncio.get_event_loop()
+
+    # Prepare next batch in a thread while current batch executes, batches convert
+    # their own fixtures, so converting fixtures doesn't block the event loop either
+    next_batch = loop.run_in_executor(None, next, batches, None)
+    try:
+        while True:
+            batch = await next_batch
+            next_batch = None
+            if batch is None:
+                return
+
+            next_batch = loop.run_in_executor(None, next, batches, None)
+            table, params = batch
+            await connection.execute(table.insert(), params)
+    finally:
+        # Wait for batch being prepared, before generator of batches is closed
+        if next_batch is not None:
+            await asyncio.wait([next_batch])
+        batches.close()
+
+
+async def load_fixtures_async(upper, bind, fixtures, batch_size=1000):
+    """Insert fixtures with executemany batches of core inserts, table by table in model order
+
+    bind can be an async engine, in which case the inserts are run in their own transaction,
+    an async connection, or an async session, which leaves committing to the caller.
+    """
+    if isinstance(bind, AsyncSession):
+        bind = await bind.connection()
+
+    batches = upper.iter_load_batches(fixtures, batch_size=batch_size)
+    if isinstance(bind, AsyncEngine):
+        async with bind.begin() as connection:
+            await _load_batches(connection, batches)
+    else:
+        await _load_batches(bind, batches)
@@ -14,6 +14,8 @@ from six import with_metaclass
 
 from sqlalchemy.inspection import inspect as sqlalchemy_inspect
 
+from fixtureupper.profiling import FixtureProfiler
+
 
 # Watch when new FixtureUppers are created and register them to the class's global dictionary
 class UpperWatcher(type):
@@ -28,6 +30,8 @@ class BaseFixtureUpper(with_metaclass(UpperWatcher, object)):
     _upper_classes = {}
     upper_aliases = {}
     all_fixtures_order = []
+    # FixtureProfiler timing stages of uppers, set on register class with enable_profiling
+    profiler = None
 
     def __init__(self, start_id=1, seed=None, upper_instances=None, **kwargs):
         self.start_id = start_id
@@ -58,10 +62,32 @@ class BaseFixtureUpper(with_metaclass(UpperWatcher, object)):
             raise Exception('Fixture Upper with name %s exists, use another name' % key)
         return key
 
+    @classmethod
+    def get_register_class(cls):
+        # Register class is the one holding the registered upper classes
+        for klass in cls.__mro__:
+            if '_upper_classes' in klass.__dict__:
+                return klass
+
+    @classmethod
+    def enable_profiling(cls, callback=None):
+        """Time stages of every fixture upper in register, returns the FixtureProfiler collecting stats"""
+        profiler = FixtureProfiler(callback=callback)
+        cls.get_register_class().profiler = profiler
+        return profiler
+
+    @classmethod
+    def disable_profiling(cls):
+        cls.get_register_class().profiler = None
+
     @classmethod
     def sorted_fixtures_key(cls, f):
         return f
 
+    @classmethod
+    def get_sorted_fixtures_key(cls):
+        return cls.sorted_fixtures_key
+
     def get_all_fixtures(self):
         list_of_lists = iter([
             instance.fixtures
@@ -70,7 +96,7 @@ class BaseFixtureUpper(with_metaclass(UpperWatcher, object)):
         ])
         return sorted(
             iter([fixture for fixture_list in list_of_lists for fixture in fixture_list]),
-            key=self.sorted_fixtures_key
+            key=self.get_sorted_fixtures_key()
         )
 
     def seed_random(self, seed=None):
@@ -0,0 +1,282 @@
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+
+from future.utils import iteritems
+import hashlib
+import json
+import os
+from past.builtins import basestring, long
+import sys
+import tempfile
+import types
+
+from fixtureupper.json_codecs import JsonCodec, JsonCodecRegistry
+from fixtureupper import snapshot
+
+
+# Class attributes that are caches, not definitions of fixture uppers
+_IGNORED_CLASS_ATTRIBUTES = {'_json_transforms', '_model_levels', '_model_ranks', '_upper_classes', 'profiler'}
+
+_PRIMITIVE_TYPES = (basestring, bytes, bool, int, long, float)
+
+
+class _Hasher(object):
+    """Hashes the definition of objects: code of functions, values of containers and
+    class attributes of classes, instead of their identities"""
+
+    def __init__(self, upper):
+        self.upper = upper
+        self.hash = hashlib.sha256()
+        self.seen = {}
+
+    def write(self, *parts):
+        for part in parts:
+            # Bytes, i.e. code, are hashed as they are, as they need not decode
+            if isinstance(part, bytes) and not isinstance(part, type('')):
+                self.hash.update(b'b' + part + b'\0')
+            else:
+                self.hash.update(('%s\0' % (part,)).encode('utf-8'))
+
+    def update(self, obj):
+        if obj is None or isinstance(obj, _PRIMITIVE_TYPES):
+            return self.write(type(obj).__name__, repr(obj))
+
+        # Objects can reference themselves, i.e. through closures.
+        # Seen objects are kept alive, so their ids aren't reused
+        seen = self.seen.get(id(obj))
+        if seen:
+            return self.write('ref', seen[0])
+        self.seen[id(obj)] = (len(self.seen), obj)
+        self._update(obj)
+
+    def _update(self, obj):
+        if isinstance(obj, (list, tuple)):
+            self.write(type(obj).__name__, len(obj))
+            for v in obj:
+                self.update(v)
+        elif isinstance(obj, (set, frozenset)):
+            self.write('set', len(obj))
+            for v in sorted(obj, key=repr):
+                self.update(v)
+        elif isinstance(obj, dict):
+            self.write('dict', len(obj))
+            for k in sorted(obj, key=repr):
+                self.update(k)
+                self.update(obj[k])
+        elif isinstance(obj, types.FunctionType):
+            self.write('function', obj.__name__)
+            self.update(obj.__code__)
+            self.update(obj.__defaults__)
+            self.update([cell.cell_contents for cell in obj.__closure__ or []])
+        elif isinstance(obj, types.MethodType):
+            self.write('method', type(obj.__self__).__name__)
+            self.update(obj.__func__)
+        elif isinstance(obj, types.BuiltinFunctionType):
+            owner = obj.__self__
+            self.write('builtin', getattr(owner, '__name__', type(owner).__name__), obj.__name__)
+        elif isinstance(obj, types.CodeType):
+            self.write('code', obj.co_code, obj.co_names, obj.co_varnames, obj.co_freevars)
+            self.update(obj.co_consts)
+        elif isinstance(obj, (classmethod, staticmethod)):
+            self.write(type(obj).__name__)
+            self.update(obj.__func__)
+        elif isinstance(obj, JsonCodecRegistry):
+            self.write('codecs')
+            self.update(sorted(obj, key=lambda codec: codec.name))
+        elif isinstance(obj, JsonCodec):
+            self.write('codec', obj.name, obj.python_type.__name__)
+            self.update([obj.encode, obj.decode])
+        elif type(obj).__name__ in self.upper._upper_classes:
+            # Fixtures are hashed by their values
+            self.write('fixture', type(obj).__name__)
+            self.update(self.upper.get_fixture_to_dict(obj))
+        elif isinstance(obj, type):
+            self.write('class', obj.__module__, obj.__name__)
+        else:
+            self.write(type(obj).__name__, repr(obj))
+
+    def update_upper_class(self, upper_class):
+        for cls in upper_class.__mro__[:-1]:
+            self.write('upper_class', cls.__module__, cls.__name__)
+            self.update({
+                k: v for k, v in iteritems(cls.__dict__)
+                if not k.startswith('__') and k not in _IGNORED_CLASS_ATTRIBUTES
+            })
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+
+class FixupCache(object):
+    """Cache of fixtures generated by build functions, saved as binary breakdowns in cache_dir
+
+    Cached fixtures are keyed on a hash of the code and class attributes of the registered fixture uppers,
+    the state of the fixture upper instances (ids, seeds and random states), and the build function and
+    its arguments. Only the code of fixture uppers and build functions is hashed, pass a new version
+    when functions they call change.
+
+    Least recently used entries are removed past max_entries or max_bytes.
+    """
+
+    def __init__(self, cache_dir, max_entries=None, max_bytes=None, version=None):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.version = version
+
+    def get_key(self, upper, build, args=(), kwargs={}):
+        hasher = _Hasher(upper)
+        hasher.write(sys.version, snapshot.FORMAT_VERSION, self.version)
+
+        hasher.update_upper_class(type(upper))
+        for key in sorted(upper._upper_classes):
+            hasher.update_upper_class(upper._upper_classes[key])
+
+        for key, instance in sorted(iteritems(upper.upper_instances)):
+            state = self._get_upper_state(instance)
+            # Without seed, fixtures aren't reproducible anyway, any cached random values will do
+            if instance.seed is None:
+                del state['random_state']
+
+            hasher.write('upper', key)
+            hasher.update(state)
+            hasher.update(instance.defaults)
+
+        hasher.update([build, args, kwargs])
+        return hasher.hexdigest()
+
+    def _get_path(self, key, ext):
+        return os.path.join(self.cache_dir, key + ext)
+
+    def _get_upper_state(self, instance):
+        return {
+            'start_id': instance.start_id,
+            'seed': instance.seed,
+            'model_id': instance.get_model_id(inc=False),
+            'random_state': instance.random.getstate(),
+        }
+
+    def fixup(self, upper, build, *args, **kwargs):
+        """Get fixtures made by build(upper, *args, **kwargs) from cache, or run build and cache them
+
+        Either way, fixtures are added to the fixture uppers and returned in model order.
+        Fixtures are read like breakdowns, so they have foreign key ids but not relations,
+        including the ones just built, which are read back from their new cache entry.
+        """
+        key = self.get_key(upper, build, args, kwargs)
+
+        fixtures = self.load(upper, key)
+        if fixtures is None:
+            fixtures = self.build(upper, key, build, *args, **kwargs)
+        return fixtures
+
+    def load(self, upper, key):
+        """Add fixtures of cache entry to fixture uppers, None if entry isn't cached"""
+        try:
+            with open(self._get_path(key, '.json'), 'r') as fin:
+                meta = json.load(fin)
+            with open(self._get_path(key, '.bin'), 'rb') as fin:
+                tables = snapshot.loads_snapshot(fin.read(), upper.json_codecs)
+        except (IOError, OSError, ValueError, EOFError, TypeError):
+            # Missing, partial or corrupt entries are rebuilt
+            return None
+
+        # Mark entry as recently used
+        os.utime(self._get_path(key, '.json'), None)
+
+        for upper_key, state in iteritems(meta['uppers']):
+            instance = upper.get_upper(upper_key, start_id=state['start_id'], seed=state['seed'])
+            instance._model_id = state['model_id']
+
+            version, internal_state, gauss_next = state['random_state']
+            instance.random.setstate((version, tuple(internal_state), gauss_next))
+
+        return self._add_fixtures(upper, tables)
+
+    def _add_fixtures(self, upper, tables):
+        fixtures = []
+        for model_name, count, keys, columns in tables:
+            instance = upper.get_upper(model_name)
+            for values in (zip(*columns) if keys else [()] * count):
+                fixture = instance.create_fixture(**{k: v for k, v in zip(keys, values) if v is not None})
+                instance.add_fixture(fixture)
+                fixtures.append(fixture)
+
+        return fixtures
+
+    def build(self, upper, key, build, *args, **kwargs):
+        """Run build, and save fixtures it made to cache entry"""
+        counts = {upper_key: len(instance.fixtures) for upper_key, instance in iteritems(upper.upper_instances)}
+        build(upper, *args, **kwargs)
+
+        fixtures = []
+        states = {}
+        for upper_key, instance in iteritems(upper.upper_instances):
+            fixtures.extend(instance.fixtures[counts.get(upper_key, 0):])
+            states[upper_key] = self._get_upper_state(instance)
+        fixtures.sort(key=upper.get_sorted_fixtures_key())
+
+        data = upper.breakdown_to_binary(fixtures)
+        self._write(key, '.bin', data, 'wb')
+        # Entry only counts as cached once its metadata exists, so metadata is written last
+        self._write(key, '.json', json.dumps({'uppers': states}), 'w')
+        self.evict()
+
+        # Replace built fixtures with the ones read back, so they're the same as on later cache hits
+        for upper_key, instance in iteritems(upper.upper_instances):
+            del instance.fixtures[counts.get(upper_key, 0):]
+        return self._add_fixtures(upper, snapshot.loads_snapshot(data, upper.json_codecs))
+
+    def _write(self, key, ext, data, mode):
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+        # Write to temporary file first, so readers never see partial entries
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, mode) as fout:
+                fout.write(data)
+            os.rename(tmp_path, self._get_path(key, ext))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def get_entries(self):
+        """Get list of (last used time, size in bytes, key) of cache entries, least recently used first"""
+        entries = []
+        for fname in os.listdir(self.cache_dir):
+            key, ext = os.path.splitext(fname)
+            if ext != '.json':
+                continue
+
+            try:
+                meta_stat = os.stat(self._get_path(key, '.json'))
+                size = meta_stat.st_size + os.path.getsize(self._get_path(key, '.bin'))
+            except OSError:
+                continue
+            entries.append((meta_stat.st_mtime, size, key))
+
+        return sorted(entries)
+
+    def remove(self, key):
+        for ext in ['.json', '.bin']:
+            try:
+                os.remove(self._get_path(key, ext))
+            except OSError:
+                pass
+
+    def evict(self):
+        entries = self.get_entries()
+        total_bytes = sum(size for _, size, _ in entries)
+
+        while entries and (
+            self.max_entries is not None and len(entries) > self.max_entries
+            or self.max_bytes is not None and total_bytes > self.max_bytes
+        ):
+            _, size, key = entries.pop(0)
+            self.remove(key)
+            total_bytes -= size
+
+    def clear(self):
+        for _, _, key in self.get_entries():
+            self.remove(key)
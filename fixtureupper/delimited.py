@@ -0,0 +1,89 @@
+"""Encoding of values for PostgreSQL COPY text and csv files"""
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+
+import binascii
+from future.utils import PY3, text_type
+import json
+from past.builtins import basestring, long
+
+
+COPY_TEXT = 'text'
+CSV = 'csv'
+
+FORMAT_EXTENSIONS = {
+    COPY_TEXT: '.copy',
+    CSV: '.csv',
+}
+
+# Characters with special meaning in COPY text rows
+_COPY_ESCAPES = {
+    ord('\\'): '\\\\',
+    ord('\t'): '\\t',
+    ord('\n'): '\\n',
+    ord('\r'): '\\r',
+}
+
+
+def escape_copy_text(value):
+    # Native strings of python 2, like encoded codec values, are translated as text
+    return text_type(value).translate(_COPY_ESCAPES)
+
+
+def quote_csv(value):
+    return '"%s"' % value.replace('"', '""')
+
+
+def _get_codec(python_type, codecs_by_type):
+    for t in python_type.__mro__:
+        codec = codecs_by_type.get(t)
+        if codec:
+            return codec
+    return None
+
+
+def get_value_encoder(codecs, format=COPY_TEXT):
+    """Get function encoding a value to a field of a COPY text or csv row
+
+    NULL is \\N in COPY text and an empty unquoted field in csv, where strings are always quoted
+    so empty strings stay distinct from NULL. Values of json codec types are encoded like strings.
+    """
+    if format not in FORMAT_EXTENSIONS:
+        raise ValueError('Unknown delimited format %r' % format)
+
+    if format == COPY_TEXT:
+        null, encode_str, bytes_prefix = '\\N', escape_copy_text, '\\\\x'
+    else:
+        null, encode_str, bytes_prefix = '', quote_csv, '\\x'
+
+    codecs_by_type = {codec.python_type: codec for codec in codecs}
+
+    def encode(value):
+        if value is None:
+            return null
+        elif isinstance(value, bool):
+            return 't' if value else 'f'
+        elif isinstance(value, bytearray) or PY3 and isinstance(value, bytes):
+            # bytea hex format
+            return bytes_prefix + binascii.hexlify(value).decode('ascii')
+        elif isinstance(value, basestring):
+            return encode_str(value)
+        elif isinstance(value, (int, long, float)):
+            # Also spells out Infinity and NaN the way PostgreSQL reads them
+            return json.dumps(value)
+
+        codec = _get_codec(type(value), codecs_by_type)
+        if codec:
+            return encode_str(codec.encode(value))
+        elif isinstance(value, (list, dict)):
+            return encode_str(json.dumps(value, sort_keys=True))
+        return encode_str('%s' % (value,))
+
+    return encode
+
+
+def get_copy_statement(table_name, column_names, format=COPY_TEXT):
+    statement = 'COPY %s (%s) FROM STDIN' % (table_name, ', '.join(column_names))
+    if format == CSV:
+        statement += ' WITH (FORMAT csv, HEADER true)'
+    return statement
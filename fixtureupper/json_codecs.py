@@ -0,0 +1,288 @@
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+
+import datetime
+from decimal import Decimal
+import json
+import re
+import uuid
+
+
+_ISO_DATE = re.compile(r'^(\d{4})-(\d\d)-(\d\d)$')
+_ISO_TIME = re.compile(r'^(\d\d):(\d\d):(\d\d)(?:\.(\d{6}))?(?:([+-])(\d\d):(\d\d))?$')
+_ISO_DATETIME = re.compile(r'^(\d{4})-(\d\d)-(\d\d)[T ](\d\d):(\d\d):(\d\d)(?:\.(\d{6}))?(?:([+-])(\d\d):(\d\d))?$')
+
+# Values written by older breakdowns through repr, i.e. Decimal('1.50'), datetime.datetime(2016, 1, 2, 3, 4, 5)
+# and datetime.datetime(2016, 1, 2, 3, 4, 5, fold=1, tzinfo=datetime.timezone(datetime.timedelta(seconds=3600), 'CET'))
+_LEGACY_DATETIME = re.compile(
+    r'^datetime\.datetime\((\d+(?:, \d+)*)(?:, fold=([01]))?'
+    r'(?:, tzinfo=datetime\.timezone(?:(\.utc)|\(datetime\.timedelta\(([^)]*)\)(?:, \'([^\'\\]*)\')?\)))?\)$'
+)
+# Arguments of timedelta reprs, keyword arguments since python 3.7, i.e. days=-1, seconds=68400
+_LEGACY_TIMEDELTA_ARG = re.compile(r'^(?:(days|seconds|microseconds)=)?(-?\d+)$')
+_LEGACY_DECIMAL = re.compile(r'^Decimal\(\'([^\']*)\'\)$')
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class FixedOffset(datetime.tzinfo):
+    """Fixed utc offset, in place of datetime.timezone on python 2"""
+
+    def __init__(self, offset, name=None):
+        self.offset = offset
+        self.name = name
+
+    def utcoffset(self, dt):
+        return self.offset
+
+    def dst(self, dt):
+        return datetime.timedelta(0)
+
+    def tzname(self, dt):
+        # Native str, as python 2 refuses unicode names
+        if self.name is not None:
+            return str(self.name)
+
+        seconds = int(self.offset.total_seconds())
+        if not seconds:
+            return str('UTC')
+
+        sign = '-' if seconds < 0 else '+'
+        hours, minutes = divmod(abs(seconds) // 60, 60)
+        return str('UTC%s%02d:%02d' % (sign, hours, minutes))
+
+    def __getinitargs__(self):
+        return (self.offset, self.name)
+
+    def __eq__(self, other):
+        return isinstance(other, FixedOffset) and other.offset == self.offset
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.offset)
+
+    def __repr__(self):
+        return 'FixedOffset(%r)' % (self.offset,)
+
+
+timezone = getattr(datetime, 'timezone', FixedOffset)
+utc = timezone(datetime.timedelta(0))
+
+
+def _get_tzinfo(sign, hours, minutes):
+    if not sign:
+        return None
+
+    offset = datetime.timedelta(hours=int(hours), minutes=int(minutes))
+    return timezone(-offset if sign == '-' else offset)
+
+
+def _match_iso(pattern, value, name):
+    match = pattern.match(value)
+    if not match:
+        raise ValueError('Cannot parse %s value %r' % (name, value))
+    return match.groups()
+
+
+def _parse_legacy_datetime(value):
+    match = _LEGACY_DATETIME.match(value)
+    if not match:
+        raise ValueError('Cannot parse datetime value %r' % value)
+
+    args, fold, is_utc, offset_args, name = match.groups()
+    if is_utc:
+        tzinfo = utc
+    elif offset_args is not None:
+        offset = _parse_legacy_timedelta(offset_args, value)
+        tzinfo = timezone(offset, name) if name is not None else timezone(offset)
+    else:
+        tzinfo = None
+
+    value = datetime.datetime(*[int(arg) for arg in args.split(', ')], tzinfo=tzinfo)
+    # Python 2 datetimes have no fold
+    if fold and hasattr(value, 'fold'):
+        value = value.replace(fold=int(fold))
+    return value
+
+
+def _parse_legacy_timedelta(args, value):
+    kwargs = {}
+    for i, arg in enumerate(args.split(', ') if args else []):
+        match = _LEGACY_TIMEDELTA_ARG.match(arg)
+        if not match or i > 2:
+            raise ValueError('Cannot parse datetime value %r' % value)
+
+        key, number = match.groups()
+        kwargs[key or ('days', 'seconds', 'microseconds')[i]] = int(number)
+    return datetime.timedelta(**kwargs)
+
+
+def _parse_datetime(value):
+    if value.startswith('datetime.'):
+        return _parse_legacy_datetime(value)
+
+    year, month, day, hour, minute, second, micro, sign, tz_hours, tz_minutes = \
+        _match_iso(_ISO_DATETIME, value, 'datetime')
+
+    return datetime.datetime(
+        int(year), int(month), int(day), int(hour), int(minute), int(second), int(micro or 0),
+        tzinfo=_get_tzinfo(sign, tz_hours, tz_minutes),
+    )
+
+
+def _parse_date(value):
+    year, month, day = _match_iso(_ISO_DATE, value, 'date')
+    return datetime.date(int(year), int(month), int(day))
+
+
+def _parse_time(value):
+    hour, minute, second, micro, sign, tz_hours, tz_minutes = _match_iso(_ISO_TIME, value, 'time')
+    return datetime.time(
+        int(hour), int(minute), int(second), int(micro or 0),
+        tzinfo=_get_tzinfo(sign, tz_hours, tz_minutes),
+    )
+
+
+def parse_decimal(value):
+    match = _LEGACY_DECIMAL.match(value)
+    return Decimal(match.group(1) if match else value)
+
+
+def _with_fromisoformat(python_type, parse):
+    # Use C implementation of iso parsing where available
+    fromisoformat = getattr(python_type, 'fromisoformat', None)
+    if not fromisoformat:
+        return parse
+
+    def _parse(value):
+        try:
+            return fromisoformat(value)
+        except ValueError:
+            return parse(value)
+
+    return _parse
+
+
+parse_datetime = _with_fromisoformat(datetime.datetime, _parse_datetime)
+parse_date = _with_fromisoformat(datetime.date, _parse_date)
+parse_time = _with_fromisoformat(datetime.time, _parse_time)
+
+
+class JsonCodec(object):
+    """Encodes python type to a json string value, and decodes it back"""
+    __slots__ = ('python_type', 'name', 'encode', 'decode')
+
+    def __init__(self, python_type, encode, decode, name=None):
+        self.python_type = python_type
+        self.name = name or python_type.__name__
+        self.encode = encode
+        self.decode = decode
+
+
+class JsonCodecRegistry(object):
+    def __init__(self, codecs=None):
+        self._codecs = {}
+        # Incremented on every change, so cached lookups built from registry can be invalidated
+        self.version = 0
+
+        for codec in codecs or []:
+            self.add(codec)
+
+    def add(self, codec):
+        self._codecs[codec.name] = codec
+        self.version += 1
+
+    def register(self, python_type, encode, decode, name=None):
+        self.add(JsonCodec(python_type, encode, decode, name=name))
+
+    def get(self, name):
+        return self._codecs.get(name)
+
+    def copy(self):
+        return JsonCodecRegistry(self)
+
+    def __iter__(self):
+        return iter(list(self._codecs.values()))
+
+
+def _isoformat(obj):
+    return obj.isoformat()
+
+
+default_json_codecs = JsonCodecRegistry([
+    JsonCodec(datetime.datetime, _isoformat, parse_datetime),
+    JsonCodec(datetime.date, _isoformat, parse_date),
+    JsonCodec(datetime.time, _isoformat, parse_time),
+    JsonCodec(Decimal, str, parse_decimal),
+    JsonCodec(uuid.UUID, str, uuid.UUID),
+])
+
+
+def iter_json_array(fin, chunk_size=65536):
+    """Incrementally decode top-level json array in file object, yielding one element at a time"""
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+    need_more = False
+    read_size = chunk_size
+    expect = '['
+
+    while True:
+        if need_more:
+            if eof:
+                raise ValueError('Unexpected end of json array')
+
+            chunk = fin.read(read_size)
+            buf = buf[pos:] + chunk
+            pos = 0
+            eof = not chunk
+            need_more = False
+
+        pos = _WHITESPACE.match(buf, pos).end()
+        if pos == len(buf):
+            need_more = True
+            continue
+
+        char = buf[pos]
+        if expect == '[':
+            if char != '[':
+                raise ValueError('Expected json array')
+            pos += 1
+            expect = 'first'
+            continue
+        elif expect != 'value' and char == ']':
+            return
+        elif expect == 'separator':
+            if char != ',':
+                raise ValueError('Expected , or ] in json array')
+            pos += 1
+            expect = 'value'
+            continue
+
+        try:
+            obj, end = decoder.raw_decode(buf, pos)
+        except ValueError:
+            if eof:
+                raise
+            end = None
+
+        # Value may continue past end of buffer, i.e. number 1.5 read up to 1., so value only
+        # ends at a following , or ]. Read more with bigger reads for large values,
+        # to avoid decoding them too many times
+        if end is not None and not eof:
+            after = _WHITESPACE.match(buf, end).end()
+            if after == len(buf) or buf[after] not in ',]':
+                end = None
+
+        if end is None:
+            need_more = True
+            read_size *= 2
+            continue
+
+        read_size = chunk_size
+        pos = end
+        expect = 'separator'
+        yield obj
@@ -1,26 +1,208 @@
 from __future__ import (absolute_import, division,
                         print_function, unicode_literals)
 
-from collections import defaultdict
 from copy import deepcopy
 import datetime
-from decimal import Decimal
-from future.utils import iteritems, iterkeys, itervalues
+from future.utils import iteritems
+import hashlib
 import inspect
+import io
 import json
+import multiprocessing
 import os
 from past.builtins import basestring
+import warnings
 
 from fixtureupper.base import BaseFixtureUpper
+from fixtureupper.delimited import COPY_TEXT, FORMAT_EXTENSIONS, get_copy_statement, get_value_encoder
+from fixtureupper.json_codecs import default_json_codecs, iter_json_array
+from fixtureupper.profiling import profiled
+from fixtureupper.snapshot import dumps_snapshot, loads_snapshot
+
+
+SHARD_EXTENSIONS = {
+    'json': '.json',
+    'sql': '.sql',
+    'binary': '.bin',
+}
+
+# Arguments of running fixup_parallel call, inherited by forked worker processes
+_parallel_fixup = None
+
+
+# Fixture upper class of running print_sharded_breakdown call, inherited by forked worker processes
+_sharded_breakdown = None
+
+
+def _fixup_parallel_chunk(chunk):
+    upper, kwargs = _parallel_fixup
+    return upper.fixup_parallel_chunk(*chunk, **kwargs)
+
+
+def _write_shard_job(job):
+    return _sharded_breakdown._write_shard(*job)
+
+
+def _map_in_processes(fn, items, processes):
+    if processes < 2 or len(items) < 2 or os.name != 'posix':
+        return [fn(item) for item in items]
+
+    # Fork, so workers inherit fixture uppers along with their generator functions
+    get_context = getattr(multiprocessing, 'get_context', None)
+    pool = (get_context('fork') if get_context else multiprocessing).Pool(min(processes, len(items)))
+    try:
+        return pool.map(fn, items, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
+class FixupPlan(object):
+    """Precomputed order in which a set of model values is applied onto a fixture"""
+    __slots__ = (
+        'static_values', 'static_relations', 'generated', 'eager_generated', 'lazy_generated', 'inferred',
+    )
+
+    def __init__(self):
+        self.static_values = []
+        self.static_relations = []
+        # List of (attr, is_relation) tuples, in generation order
+        self.generated = []
+        # Generated values after the last generated relation can be deferred in lazy mode
+        self.eager_generated = []
+        self.lazy_generated = []
+        # Whether generation order was inferred from attributes read by generators
+        self.inferred = False
+
+    def set_generated(self, generated):
+        self.generated = generated
+
+        lazy_from = max([i + 1 for i, (attr, is_relation) in enumerate(generated) if is_relation] or [0])
+        self.eager_generated = generated[:lazy_from]
+        self.lazy_generated = [attr for attr, is_relation in generated[lazy_from:]]
+
+
+# Tracked fixtures passed to generators while their order is inferred
+_tracked_fixtures = []
+
+
+def _untracked(value):
+    if isinstance(value, list):
+        return [_untracked(v) for v in value]
+    return object.__getattribute__(value, '_fixture') if isinstance(value, _TrackedFixture) else value
+
+
+class _TrackedFixture(object):
+    """Proxy of fixture, that generates attributes read by a generator before returning them"""
+    __slots__ = ('_fixture', '_on_read')
+
+    def __init__(self, fixture, on_read):
+        object.__setattr__(self, '_fixture', fixture)
+        object.__setattr__(self, '_on_read', on_read)
+
+    @property
+    def __class__(self):
+        return type(self._fixture)
+
+    def __getattr__(self, name):
+        self._on_read(name)
+        return getattr(self._fixture, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._fixture, name, value)
+
+
+class LazyGeneratedValues(object):
+    """Generated attributes of a fixture that are not computed yet, in generation order"""
+    __slots__ = ('upper', 'model_values', 'pending', 'resolving')
+
+    def __init__(self, upper, model_values, pending):
+        self.upper = upper
+        self.model_values = model_values
+        self.pending = pending
+        self.resolving = False
+
+    def resolve(self, fixture, attr=None):
+        """Compute pending attributes in order, up to attr or all of them"""
+        # Like in eager mode, generators don't see attributes generated after them
+        if self.resolving or attr is not None and attr not in self.pending:
+            return
+
+        set_relation, call_generator = self.upper.get_fixup_callers()
+        self.resolving = True
+        try:
+            while self.pending:
+                key = self.pending.pop(0)
+                setattr(fixture, key, call_generator(self.model_values[key], fixture, key))
+                if key == attr:
+                    break
+        finally:
+            self.resolving = False
+
+        if not self.pending:
+            fixture._lazy_generated = None
+
+
+class TableBuffer(object):
+    """Columnar buffer of the fixture dicts of a single model
+
+    Every column holds one value per fixture, None where a fixture has no value for that column
+    """
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self.fixtures = []
+        self.columns = {}
+
+    def append(self, fixture, row):
+        size = len(self.fixtures)
+
+        for key, value in iteritems(row):
+            column = self.columns.get(key)
+            if column is None:
+                column = self.columns[key] = [None] * size
+            column.append(value)
+
+        self.fixtures.append(fixture)
+        size += 1
+
+        if len(row) < len(self.columns):
+            for column in self.columns.values():
+                if len(column) < size:
+                    column.append(None)
+
+    @property
+    def keys(self):
+        return sorted(self.columns)
+
+    def iter_rows(self, keys=None):
+        """Yield tuples of values of keys, one per fixture"""
+        keys = self.keys if keys is None else keys
+        return zip(*[self.columns[key] for key in keys]) if keys else iter([()] * len(self))
+
+    def __len__(self):
+        return len(self.fixtures)
 
 
 class ModelFixtureUpper(BaseFixtureUpper):
     required_attributes = []
     generated_field_order = []
+    # Defer generated values that no generated relation depends on, until they are read or broken down
+    lazy_generated = False
+    # Order generated values by the attributes their generators read on first fixup, after generated_field_order
+    infer_generated_field_order = False
+    # Set on fixture uppers generating fixup_parallel chunks
+    parallel_chunk = False
+    json_codecs = default_json_codecs
+    # Keep primary keys of fixtures created or changed since the last breakdown, for incremental breakdowns
+    track_changes = False
 
     def __init__(self, *args, **kwargs):
         super(ModelFixtureUpper, self).__init__(*args, **kwargs)
         self._model_id = self.start_id
+        self.invalidate_fixup_plans()
+        # Primary keys of fixtures created or changed since the last clear_dirty, None marks all of them
+        self.dirty_keys = set()
 
         if getattr(self, 'model', None):
             # Load the primary key of model into fixture upper
@@ -45,25 +227,15 @@ class ModelFixtureUpper(BaseFixtureUpper):
 
         return obj_json
 
-    @classmethod
-    def dynamic_import_and_eval(cls, import_statement, eval_str):
-        # FIXME Runtime imports and evals...ew.
-        # noinspection PyUnresolvedReferences
-        exec(import_statement)
-        return eval(eval_str)
-
     @classmethod
     def get_python_objects_for_json(cls):
-        pos = {
-            datetime.datetime: {
-                'to_json': lambda obj: cls.make_obj_json(obj, repr(obj)),
-                'from_json': lambda obj: cls.dynamic_import_and_eval('import datetime', obj['__value__']),
-            },
-            Decimal: {
-                'to_json': lambda obj: cls.make_obj_json(obj, repr(obj)),
-                'from_json': lambda obj: cls.dynamic_import_and_eval('from decimal import Decimal', obj['__value__']),
-            },
-        }
+        def get_codec_transforms(codec):
+            return {
+                'to_json': lambda obj: cls.make_obj_json(obj, codec.encode(obj)),
+                'from_json': lambda obj: codec.decode(obj['__value__']),
+            }
+
+        pos = {codec.python_type: get_codec_transforms(codec) for codec in cls.json_codecs}
 
         def get_from_json(model):
             return lambda obj: model(**obj['__value__'])
@@ -77,6 +249,23 @@ class ModelFixtureUpper(BaseFixtureUpper):
 
         return pos
 
+    @classmethod
+    def get_json_transforms(cls):
+        """Get python objects for json, indexed by type and by class name
+
+        Cached per class, and rebuilt when fixture uppers or json codecs are added
+        """
+        key = (len(cls._upper_classes), cls.json_codecs, cls.json_codecs.version)
+        cached = cls.__dict__.get('_json_transforms')
+
+        if not cached or cached[0] != key:
+            python_objects = cls.get_python_objects_for_json()
+            by_name = {po.__name__: transforms for po, transforms in iteritems(python_objects)}
+            cached = (key, python_objects, by_name)
+            cls._json_transforms = cached
+
+        return cached[1], cached[2]
+
     @classmethod
     def get_fixture_to_dict(cls, fixture):
         raise NotImplementedError
@@ -86,29 +275,182 @@ class ModelFixtureUpper(BaseFixtureUpper):
         fields = cls.get_fixture_to_dict(fixture)
         return cls.make_obj_json(fixture, fields)
 
+    def get_all_fixtures(self):
+        """Get fixtures of every fixture upper in register, already in model order"""
+        fixtures = []
+        for key in sorted(self.upper_instances, key=self.sorted_models_key):
+            fixtures.extend(self.upper_instances[key].fixtures)
+        return fixtures
+
+    def add_fixture(self, fixture):
+        self.fixtures.append(fixture)
+        if self.track_changes:
+            self.mark_dirty(fixture)
+
+    def mark_dirty(self, fixture):
+        """Mark fixture as changed, to be rewritten by the next incremental breakdown"""
+        self.mark_dirty_key(type(fixture).__name__, self.get_fixture_key(fixture))
+
+    def mark_dirty_key(self, model_name, key=None):
+        if self.track_changes:
+            self.get_upper(model_name).dirty_keys.add(key)
+
+    def get_dirty(self):
+        """Get {model name: set of primary keys} of fixtures created or changed"""
+        return {
+            model_name: set(upper.dirty_keys)
+            for model_name, upper in iteritems(self.upper_instances)
+            if upper.dirty_keys
+        }
+
+    def clear_dirty(self):
+        for upper in self.upper_instances.values():
+            upper.dirty_keys = set()
+
+    def stop_tracking_changes(self):
+        """Forget changes of the fixtures of every fixture upper in register"""
+        self.clear_dirty()
+
+    @classmethod
+    def get_fixture_key(cls, fixture):
+        """Get primary key value of fixture, None if it has none"""
+        return None
+
     def get_current_json_breakdown(self):
-        return self.breakdown_to_json(self.get_all_fixtures())
+        return ''.join(self.iter_json_breakdown_chunks(self.get_all_fixtures(), presorted=True))
+
+    def get_current_sql_breakdown(self, rows_per_insert=None):
+        return self.breakdown_to_sql(self.get_all_fixtures(), rows_per_insert=rows_per_insert)
+
+    @classmethod
+    def get_model_dependencies(cls):
+        """Get names of the models that each registered model depends on"""
+        return {
+            name: set()
+            for name, upper_class in iteritems(cls._upper_classes)
+            if getattr(upper_class, 'model', None)
+        }
+
+    @classmethod
+    def get_optional_model_dependencies(cls):
+        """Get names of the models that each model depends on, whose fixtures can be inserted after it"""
+        return {}
+
+    @classmethod
+    def order_model_levels(cls):
+        """Get lists of model names, where models only depend on models of the lists before them,
+        along with the set of models ordered in spite of cyclic dependencies
+        """
+        # Models in all_fixtures_order come first, one at a time in that order
+        levels = []
+        ordered = set()
+        for model_name in cls.all_fixtures_order:
+            if model_name not in ordered:
+                levels.append([model_name])
+                ordered.add(model_name)
+
+        # Then the rest of the models, after the models they depend on
+        pending = {
+            model_name: set(dependencies) - {model_name}
+            for model_name, dependencies in iteritems(cls.get_model_dependencies())
+            if model_name not in ordered
+        }
+        for dependencies in pending.values():
+            dependencies.intersection_update(pending)
+
+        optional = cls.get_optional_model_dependencies()
+        cyclic = set()
+        while pending:
+            ready = sorted(model_name for model_name, dependencies in iteritems(pending) if not dependencies)
+            if not ready:
+                # Break cycles by dropping optional dependencies first, then by ordering the first model by name
+                for model_name, dependencies in iteritems(pending):
+                    if dependencies & optional.get(model_name, set()):
+                        dependencies.difference_update(optional[model_name])
+                        cyclic.add(model_name)
+                ready = sorted(model_name for model_name, dependencies in iteritems(pending) if not dependencies)
+                if not ready:
+                    ready = [min(pending)]
+                    cyclic.add(ready[0])
+
+            levels.append(ready)
+            for model_name in ready:
+                del pending[model_name]
+
+            for dependencies in pending.values():
+                dependencies.difference_update(ready)
+
+        return levels, cyclic
+
+    @classmethod
+    def compute_model_levels(cls):
+        levels, cyclic = cls.order_model_levels()
+        if cyclic:
+            warnings.warn(
+                'Models %s have cyclic dependencies, order them with all_fixtures_order' % ', '.join(sorted(cyclic)),
+                stacklevel=2,
+            )
+        return levels
+
+    @classmethod
+    def compute_model_ranks(cls):
+        ranks = {}
+        for level in cls.get_model_levels():
+            for model_name in level:
+                ranks[model_name] = len(ranks)
+        return ranks
+
+    @classmethod
+    def _get_cached_model_order(cls, attr, compute):
+        # Cached until all_fixtures_order or registered uppers change
+        key = (len(cls._upper_classes), tuple(cls.all_fixtures_order))
+        cached = cls.__dict__.get(attr)
+
+        if not cached or cached[0] != key:
+            cached = (key, compute())
+            setattr(cls, attr, cached)
 
-    def get_current_sql_breakdown(self):
-        return self.breakdown_to_sql(self.get_all_fixtures())
+        return cached[1]
+
+    @classmethod
+    def get_model_levels(cls):
+        return cls._get_cached_model_order('_model_levels', cls.compute_model_levels)
+
+    @classmethod
+    def get_cyclic_models(cls):
+        """Get names of models ordered in spite of cyclic dependencies"""
+        return cls._get_cached_model_order('_cyclic_models', lambda: cls.order_model_levels()[1])
+
+    @classmethod
+    def get_model_ranks(cls):
+        """Get insert order of every model"""
+        return cls._get_cached_model_order('_model_ranks', cls.compute_model_ranks)
 
     @classmethod
     def sorted_models_key(cls, model_name):
-        # FIXME: sort working depends on number of fixture model classes being less than 10000
-        try:
-            order_num = cls.all_fixtures_order.index(model_name)
-        except:
-            order_num = len(cls.all_fixtures_order)
-        return '%04d_%s' % (order_num, model_name)
+        ranks = cls.get_model_ranks()
+        # Models without rank are sorted last, by name
+        return ranks.get(model_name, len(ranks)), model_name
 
     @classmethod
     def sorted_fixtures_key(cls, f):
         return cls.sorted_models_key(type(f).__name__)
 
+    @classmethod
+    def get_sorted_fixtures_key(cls):
+        ranks = cls.get_model_ranks()
+        default_rank = len(ranks)
+
+        def _sort_key(f):
+            model_name = type(f).__name__
+            return ranks.get(model_name, default_rank), model_name
+
+        return _sort_key
+
     # Transform python object into json compatible representation
     @classmethod
     def get_default_to_json(cls):
-        python_objects = cls.get_python_objects_for_json()
+        python_objects, by_name = cls.get_json_transforms()
 
         def _to_json(obj):
             # Check if type is directly in python_objects
@@ -117,55 +459,131 @@ class ModelFixtureUpper(BaseFixtureUpper):
                 return transforms['to_json'](obj)
 
             # Else check if superclass is in python_objects
-            for python_object, transforms in iteritems(python_objects):
-                if isinstance(obj, python_object):
+            for python_object in type(obj).__mro__:
+                transforms = python_objects.get(python_object)
+                if transforms:
                     return transforms['to_json'](obj)
             return obj
 
         return _to_json
 
     @classmethod
+    def iter_json_breakdown_chunks(cls, fixtures, presorted=False):
+        """Serialize fixtures one at a time, chunks join to the same string as breakdown_to_json"""
+        if not presorted:
+            fixtures = sorted(fixtures or [], key=cls.get_sorted_fixtures_key())
+        return cls._iter_json_array_chunks(fixtures or [])
+
+    @classmethod
+    def _iter_json_array_chunks(cls, objs):
+        encoder = json.JSONEncoder(indent=4, default=cls.get_default_to_json(), sort_keys=True)
+        newline = '\n' + ' ' * 4
+        separator = '['
+
+        for obj in objs:
+            # Serialized json never contains raw newlines inside of strings,
+            # so nested fixture can be indented by replacing them
+            yield separator + newline + encoder.encode(obj).replace('\n', newline)
+            separator = encoder.item_separator
+
+        yield '[]' if separator == '[' else '\n]'
+
+    @classmethod
+    @profiled('breakdown_to_json')
     def breakdown_to_json(cls, fixtures):
-        out = sorted(fixtures or [], key=cls.sorted_fixtures_key)
-        return json.dumps(out, indent=4, default=cls.get_default_to_json(), sort_keys=True)
+        return ''.join(cls.iter_json_breakdown_chunks(fixtures))
+
+    @classmethod
+    def _write_breakdown_chunks(cls, fout, chunks):
+        # Accept either path or file object
+        if isinstance(fout, basestring):
+            with open(fout, 'w') as _fout:
+                return cls._write_breakdown_chunks(_fout, chunks)
+
+        for chunk in chunks:
+            fout.write(chunk)
+
+    @classmethod
+    @profiled('write_json_breakdown')
+    def write_json_breakdown(cls, fout, fixtures):
+        """Stream json breakdown of fixtures into file object or path"""
+        return cls._write_breakdown_chunks(fout, cls.iter_json_breakdown_chunks(fixtures))
 
     @classmethod
     def print_breakdown(cls, *args, **kwargs):
         return cls.print_json_breakdown(*args, **kwargs)
 
     @classmethod
-    def _print_breakdown(cls, savedir, fname, data):
-        """Function to print model fixtures into generated file"""
+    def _get_breakdown_path(cls, savedir, fname):
         if not os.path.exists(savedir):
             os.makedirs(savedir)
+        return os.path.join(savedir, fname)
 
-        with open(os.path.join(savedir, fname), 'w') as fout:
+    @classmethod
+    def _print_breakdown(cls, savedir, fname, data):
+        """Function to print model fixtures into generated file"""
+        with open(cls._get_breakdown_path(savedir, fname), 'w') as fout:
             fout.write(data)
 
     @classmethod
     def print_json_breakdown(cls, savedir, fname, fixtures):
-        return cls._print_breakdown(savedir, fname, cls.breakdown_to_json(fixtures))
+        return cls.write_json_breakdown(cls._get_breakdown_path(savedir, fname), fixtures)
 
     @classmethod
-    def print_sql_breakdown(cls, savedir, fname, fixtures):
-        return cls._print_breakdown(savedir, fname, cls.breakdown_to_sql(fixtures))
+    def print_sql_breakdown(cls, savedir, fname, fixtures, rows_per_insert=None):
+        path = cls._get_breakdown_path(savedir, fname)
+        return cls.write_sql_breakdown(path, fixtures, rows_per_insert=rows_per_insert)
 
     @classmethod
-    def sort_fixtures_by_model(cls, fixtures):
-        def _get_default_dict():
-            return {
-                'keys': set(),
-                'values': [],
-            }
+    @profiled('breakdown_to_binary')
+    def breakdown_to_binary(cls, fixtures):
+        """Serialize fixtures to binary snapshot, storing columns of values per model"""
+        return cls._dumps_binary_tables(cls.iter_fixtures_by_model(fixtures))
 
-        _fixtures = defaultdict(_get_default_dict)
+    @classmethod
+    def _dumps_binary_tables(cls, buffers):
+        tables = []
+        for model_name, buffer in buffers:
+            keys = buffer.keys
+            tables.append((model_name, len(buffer), keys, [buffer.columns[key] for key in keys]))
+        return dumps_snapshot(tables, cls.json_codecs)
+
+    @classmethod
+    def write_binary_breakdown(cls, fout, fixtures):
+        """Write binary breakdown of fixtures into binary file object or path"""
+        if isinstance(fout, basestring):
+            with open(fout, 'wb') as _fout:
+                return cls.write_binary_breakdown(_fout, fixtures)
+
+        fout.write(cls.breakdown_to_binary(fixtures))
+
+    @classmethod
+    def print_binary_breakdown(cls, savedir, fname, fixtures):
+        return cls.write_binary_breakdown(cls._get_breakdown_path(savedir, fname), fixtures)
+
+    @classmethod
+    @profiled('sort_fixtures_by_model')
+    def sort_fixtures_by_model(cls, fixtures):
+        """Group fixtures into a TableBuffer per model, converting each fixture to a dict only once"""
+        buffers = {}
 
         for f in fixtures:
-            table = _fixtures[type(f).__name__]
-            table['keys'].update(cls.get_fixture_to_dict(f).keys())
-            table['values'].append(f)
+            model_name = type(f).__name__
+            buffer = buffers.get(model_name)
+            if buffer is None:
+                buffer = buffers[model_name] = TableBuffer(model_name)
+            buffer.append(f, cls.get_fixture_to_dict(f))
+
+        return buffers
+
+    @classmethod
+    def iter_fixtures_by_model(cls, fixtures):
+        """Yield (model name, TableBuffer) of fixtures, in model order
 
-        return _fixtures
+        Fixtures are grouped by model first, and only converted to dicts one table at a time
+        """
+        for model_name, group in cls.group_fixtures_by_model(fixtures):
+            yield model_name, cls.sort_fixtures_by_model(group)[model_name]
 
     @classmethod
     def to_sql(cls, val):
@@ -182,34 +600,272 @@ class ModelFixtureUpper(BaseFixtureUpper):
         raise NotImplementedError
 
     @classmethod
-    def breakdown_to_sql(cls, fixtures):
-        fixtures = cls.sort_fixtures_by_model(fixtures)
-        statement_groups = []
+    def iter_sql_breakdown_chunks(cls, fixtures, rows_per_insert=None):
+        """Serialize fixtures one row at a time, splitting each table into
+        INSERT statements of at most rows_per_insert rows"""
+        if rows_per_insert is not None and rows_per_insert < 1:
+            raise ValueError('rows_per_insert must be a positive number')
 
-        def _sort_key(_tuple):
-            return cls.sorted_models_key(_tuple[0])
+        statement_end = ''
 
-        for model_name, table_dict in sorted(iteritems(fixtures), key=_sort_key):
-            fixture_list = table_dict['values']
-            if not fixture_list:
-                continue
+        for model_name, buffer in cls.iter_fixtures_by_model(fixtures):
+            table_name = cls.get_table_name_from_fixture(buffer.fixtures[0])
+            if statement_end:
+                yield statement_end
+            for chunk in cls._iter_sql_table_chunks(table_name, buffer, rows_per_insert):
+                yield chunk
+            statement_end = ';\n\n'
 
-            table_name = cls.get_table_name_from_fixture(fixture_list[0])
-            data_keys = sorted(list(table_dict['keys']))
-            header = 'INSERT INTO %s (%s) VALUES' % (table_name, ', '.join(data_keys))
+        if statement_end:
+            yield ';\n'
 
-            statements = [
-                '(%s)' % ', '.join(cls.to_sql(getattr(f, key)) for key in data_keys)
-                for f in fixture_list
-            ]
-            statement_groups.append('%s\n%s;\n' % (header, ',\n'.join(statements)))
+    @classmethod
+    def _iter_sql_table_chunks(cls, table_name, buffer, rows_per_insert=None):
+        # INSERT statements of a TableBuffer, without the end of the last statement
+        data_keys = buffer.keys
+        header = 'INSERT INTO %s (%s) VALUES\n' % (table_name, ', '.join(data_keys))
+        rows = rows_per_insert or len(buffer)
+
+        for i, values in enumerate(buffer.iter_rows(data_keys)):
+            if i % rows:
+                yield ',\n'
+            else:
+                yield (';\n\n' if i else '') + header
+            yield '(%s)' % ', '.join(cls.to_sql(value) for value in values)
 
-        return '\n'.join(statement_groups)
+    @classmethod
+    @profiled('breakdown_to_sql')
+    def breakdown_to_sql(cls, fixtures, rows_per_insert=None):
+        return ''.join(cls.iter_sql_breakdown_chunks(fixtures, rows_per_insert=rows_per_insert))
 
     @classmethod
-    def fixup_from_json(cls, json_str):
-        python_objects = cls.get_python_objects_for_json()
-        po_by_name = {po.__name__: transforms for po, transforms in iteritems(python_objects)}
+    @profiled('write_sql_breakdown')
+    def write_sql_breakdown(cls, fout, fixtures, rows_per_insert=None):
+        """Stream sql breakdown of fixtures into file object or path"""
+        chunks = cls.iter_sql_breakdown_chunks(fixtures, rows_per_insert=rows_per_insert)
+        return cls._write_breakdown_chunks(fout, chunks)
+
+    @classmethod
+    def get_breakdown_columns(cls, fixture):
+        """Get list of (key, column name) of the mapped columns of the model of fixture"""
+        raise NotImplementedError
+
+    @classmethod
+    def iter_delimited_chunks(cls, fixtures, columns, format=COPY_TEXT):
+        """Serialize fixtures of a model one row at a time, to COPY text or csv with header"""
+        encode = get_value_encoder(cls.json_codecs, format=format)
+        separator = '\t' if format == COPY_TEXT else ','
+        keys = [key for key, name in columns]
+
+        if format != COPY_TEXT:
+            yield separator.join(name for key, name in columns) + '\n'
+
+        for f in fixtures:
+            row = cls.get_fixture_to_dict(f)
+            yield separator.join([encode(row.get(key)) for key in keys]) + '\n'
+
+    @classmethod
+    @profiled('print_delimited_breakdown')
+    def print_delimited_breakdown(cls, savedir, fixtures, format=COPY_TEXT, manifest_name='manifest.json'):
+        """Write a COPY text or csv file per table into savedir, and a manifest of the files in load order
+
+        Every manifest entry has the model, table, file, column names, row count, and
+        COPY statement of a file. Returns the manifest.
+        """
+        # Refuse unknown formats before writing anything
+        get_value_encoder(cls.json_codecs, format=format)
+        tables = []
+
+        # Fixtures are only grouped up front, and converted as their rows are written
+        for model_name, group in cls.group_fixtures_by_model(fixtures):
+            table_name = cls.get_table_name_from_fixture(group[0])
+            columns = cls.get_breakdown_columns(group[0])
+            column_names = [name for key, name in columns]
+            fname = table_name + FORMAT_EXTENSIONS[format]
+
+            # Rows are ended by newlines alone, whatever the platform
+            with io.open(cls._get_breakdown_path(savedir, fname), 'w', encoding='utf-8', newline='') as fout:
+                cls._write_breakdown_chunks(fout, cls.iter_delimited_chunks(group, columns, format=format))
+
+            tables.append({
+                'model': model_name,
+                'table': table_name,
+                'file': fname,
+                'columns': column_names,
+                'rows': len(group),
+                'copy': get_copy_statement(table_name, column_names, format=format),
+            })
+
+        manifest = {'format': format, 'tables': tables}
+        with open(cls._get_breakdown_path(savedir, manifest_name), 'w') as fout:
+            json.dump(manifest, fout, indent=4, sort_keys=True)
+        return manifest
+
+    @classmethod
+    def group_fixtures_by_model(cls, fixtures):
+        """Get list of (model name, fixtures of model) of fixtures, in model order"""
+        groups = {}
+        for f in fixtures:
+            model_name = type(f).__name__
+            group = groups.get(model_name)
+            if group is None:
+                group = groups[model_name] = []
+            group.append(f)
+
+        return [(model_name, groups[model_name]) for model_name in sorted(groups, key=cls.sorted_models_key)]
+
+    @classmethod
+    def _write_shard(cls, path, format, model_name, table_name, rows):
+        """Write shard from fixture dicts of a model, so it can be written by another process"""
+        if format == 'json':
+            objs = ({'__class__': model_name, '__value__': row} for row in rows)
+            return cls._write_breakdown_chunks(path, cls._iter_json_array_chunks(objs))
+
+        buffer = TableBuffer(model_name)
+        for row in rows:
+            buffer.append(None, row)
+
+        if format == 'sql':
+            cls._write_breakdown_chunks(path, cls._iter_sql_table_chunks(table_name, buffer))
+            with open(path, 'a') as fout:
+                fout.write(';\n')
+        else:
+            with open(path, 'wb') as fout:
+                fout.write(cls._dumps_binary_tables([(model_name, buffer)]))
+
+    @classmethod
+    def _read_shard_index(cls, savedir, index_name):
+        path = os.path.join(savedir, index_name)
+        if not os.path.exists(path):
+            raise RuntimeError
+
+        with open(path, 'r') as fin:
+            return json.load(fin)
+
+    @classmethod
+    def _is_unchanged_shard(cls, savedir, entry, previous_entry, keys, dirty_keys):
+        if not previous_entry or previous_entry.get('keys') != entry['keys']:
+            return False
+        if None in dirty_keys or any(key in dirty_keys for key in keys):
+            return False
+        return os.path.exists(os.path.join(savedir, entry['file']))
+
+    @classmethod
+    @profiled('print_sharded_breakdown')
+    def print_sharded_breakdown(cls, savedir, fixtures, format='json', rows_per_shard=None, workers=None,
+                                index_name='index.json', dirty=None):
+        """Write a json, sql or binary breakdown per model, or per rows_per_shard fixtures of a model, into savedir
+
+        Fixtures are converted to dicts here, then shards are serialized and written by a pool of
+        worker processes, like fixup_parallel. The index of shards, in load order, is written once
+        all shards are, and returned.
+
+        If dirty {model name: set of primary keys} is passed, shards of the existing index in savedir
+        are kept when they hold the same fixtures as before and none of the dirty ones.
+        """
+        global _sharded_breakdown
+
+        if format not in SHARD_EXTENSIONS:
+            raise ValueError('Unknown shard format %r' % format)
+        if rows_per_shard is not None and rows_per_shard < 1:
+            raise ValueError('rows_per_shard must be a positive number')
+
+        shards = []
+        for model_name, model_fixtures in cls.group_fixtures_by_model(fixtures):
+            rows = rows_per_shard or len(model_fixtures)
+            for index, offset in enumerate(range(0, len(model_fixtures), rows)):
+                shards.append((model_name, index, model_fixtures[offset:offset + rows]))
+
+        previous_entries = {}
+        if dirty is not None and os.path.exists(os.path.join(savedir, index_name)):
+            previous_index = cls._read_shard_index(savedir, index_name)
+            if previous_index['format'] == format:
+                previous_entries = {entry['file']: entry for entry in previous_index['shards']}
+
+        entries = []
+        jobs = []
+        for model_name, index, shard_fixtures in shards:
+            fname = '%s_%05d%s' % (model_name, index, SHARD_EXTENSIONS[format])
+            # Fingerprint of which fixtures are in the shard, to tell when shards shift
+            keys = [cls.get_fixture_key(f) for f in shard_fixtures]
+            entry = {
+                'model': model_name,
+                'file': fname,
+                'rows': len(shard_fixtures),
+                'keys': hashlib.sha1(repr(keys).encode('utf-8')).hexdigest(),
+            }
+            entries.append(entry)
+
+            previous_entry = previous_entries.pop(fname, None)
+            dirty_keys = dirty.get(model_name, ()) if dirty else ()
+            if not cls._is_unchanged_shard(savedir, entry, previous_entry, keys, dirty_keys):
+                jobs.append((
+                    cls._get_breakdown_path(savedir, fname),
+                    format,
+                    model_name,
+                    cls.get_table_name_from_fixture(shard_fixtures[0]) if format == 'sql' else None,
+                    [cls.get_fixture_to_dict(f) for f in shard_fixtures],
+                ))
+
+        _sharded_breakdown = cls
+        try:
+            _map_in_processes(_write_shard_job, jobs, workers or multiprocessing.cpu_count())
+        finally:
+            _sharded_breakdown = None
+
+        shard_index = {'format': format, 'shards': entries}
+        with open(cls._get_breakdown_path(savedir, index_name), 'w') as fout:
+            json.dump(shard_index, fout, indent=4, sort_keys=True)
+
+        # Remove shards of previous index that are no longer in the breakdown
+        for entry in previous_entries.values():
+            path = os.path.join(savedir, entry['file'])
+            if os.path.exists(path):
+                os.remove(path)
+
+        return shard_index
+
+    def print_current_sharded_breakdown(self, savedir, incremental=False, **kwargs):
+        """Write sharded breakdown of all fixtures, and clear their changes
+
+        Incremental breakdowns only rewrite shards with fixtures created or changed since the last
+        breakdown, and need track_changes. Changes of fixture rows, and of model instances made by
+        other means than setting their mapped attributes, should be marked with mark_dirty.
+        """
+        if incremental and not self.track_changes:
+            raise ValueError('Incremental breakdowns need track_changes')
+
+        dirty = self.get_dirty() if incremental else None
+        shard_index = self.print_sharded_breakdown(savedir, self.get_all_fixtures(), dirty=dirty, **kwargs)
+        self.clear_dirty()
+        return shard_index
+
+    @classmethod
+    def read_sharded_breakdown(cls, savedir, classes=None, index_name='index.json'):
+        """Read fixtures of json or binary shards in savedir, optionally only shards of passed models or model names"""
+        shard_index = cls._read_shard_index(savedir, index_name)
+        format = shard_index['format']
+        if format == 'sql':
+            raise ValueError('Sql shards cannot be read back into fixtures')
+
+        if classes is not None:
+            classes = {c if isinstance(c, basestring) else c.__name__ for c in classes}
+
+        fixtures = []
+        for entry in shard_index['shards']:
+            if classes is not None and entry['model'] not in classes:
+                continue
+
+            shard_path = os.path.join(savedir, entry['file'])
+            if format == 'json':
+                fixtures.extend(cls.read_json_breakdown(shard_path))
+            else:
+                fixtures.extend(cls.read_binary_breakdown(shard_path))
+        return fixtures
+
+    @classmethod
+    def get_from_json(cls):
+        python_objects, po_by_name = cls.get_json_transforms()
 
         # Transform json representation of python object to python object
         # TODO Add ability to get using super_classes
@@ -220,7 +876,12 @@ class ModelFixtureUpper(BaseFixtureUpper):
                     return transforms['from_json'](obj)
             return obj
 
-        return json.loads(json_str, object_hook=from_json)
+        return from_json
+
+    @classmethod
+    @profiled('fixup_from_json')
+    def fixup_from_json(cls, json_str):
+        return json.loads(json_str, object_hook=cls.get_from_json())
 
     @classmethod
     def read_json_breakdown(cls, fname):
@@ -231,6 +892,71 @@ class ModelFixtureUpper(BaseFixtureUpper):
         with open(fname, 'r') as data_file:
             return cls.fixup_from_json(data_file.read())
 
+    @classmethod
+    def iter_json_breakdown(cls, fname, classes=None):
+        """Read json file one fixture at a time, optionally only fixtures of passed models or model names"""
+        if isinstance(fname, basestring):
+            if not os.path.exists(fname):
+                raise RuntimeError
+
+            with open(fname, 'r') as data_file:
+                for fixture in cls.iter_json_breakdown(data_file, classes=classes):
+                    yield fixture
+            return
+
+        from_json = cls.get_from_json()
+        if classes is not None:
+            classes = {c if isinstance(c, basestring) else c.__name__ for c in classes}
+
+        # Apply object hook bottom up like json.loads, after skipped classes are filtered out
+        def _revive(obj):
+            if isinstance(obj, dict):
+                return from_json({k: _revive(v) for k, v in iteritems(obj)})
+            elif isinstance(obj, list):
+                return [_revive(v) for v in obj]
+            return obj
+
+        for obj in iter_json_array(fname):
+            if classes is None or isinstance(obj, dict) and obj.get('__class__') in classes:
+                yield _revive(obj)
+
+    @classmethod
+    @profiled('fixup_from_binary')
+    def fixup_from_binary(cls, data, classes=None):
+        """Get fixtures from binary snapshot, optionally only fixtures of passed models or model names"""
+        models = {
+            upper_class.model.__name__: upper_class.model
+            for upper_class in cls._upper_classes.values()
+            if getattr(upper_class, 'model', None)
+        }
+        if classes is not None:
+            classes = {c if isinstance(c, basestring) else c.__name__ for c in classes}
+
+        fixtures = []
+        for model_name, count, keys, columns in loads_snapshot(data, cls.json_codecs, model_names=classes):
+            model = models.get(model_name)
+            if not model:
+                raise ValueError('Snapshot has fixtures of unregistered model %s' % model_name)
+
+            # Leave out null values, like json breakdowns do
+            for values in (zip(*columns) if keys else [()] * count):
+                model_values = {key: value for key, value in zip(keys, values) if value is not None}
+                fixtures.append(model(**model_values))
+
+        return fixtures
+
+    @classmethod
+    def read_binary_breakdown(cls, fname, classes=None):
+        """Read binary breakdown file to get fixtures"""
+        if isinstance(fname, basestring):
+            if not os.path.exists(fname):
+                raise RuntimeError
+
+            with open(fname, 'rb') as data_file:
+                return cls.fixup_from_binary(data_file.read(), classes=classes)
+
+        return cls.fixup_from_binary(fname.read(), classes=classes)
+
     def get_model_attr_key(self, model=None):
         raise NotImplementedError
 
@@ -240,82 +966,198 @@ class ModelFixtureUpper(BaseFixtureUpper):
             self._model_id += 1
         return v
 
+    def reserve_model_ids(self, count):
+        # Reserve a contiguous block of ids
+        start = self._model_id
+        self._model_id += count
+        return range(start, start + count)
+
     def set_relation(self, fixture, related_fixtures, relation_prop):
         raise NotImplementedError
 
+    def set_relation_ids(self, fixture, related_fixtures, relation_prop):
+        """Set foreign keys of fixture to related fixtures, without relating any objects"""
+        raise NotImplementedError
+
     def _is_generator_function(self, obj):
         return callable(obj)
 
     def _call_generator_function(self, fn, fixture, key):
         return fn(self, fixture, key)
 
-    def set_fixture_values(self, model_values, fixture=None):
-        # Init model if None passed
-        fixture = fixture or self.model()
-
-        buckets = defaultdict(dict)
-        relationships = self.get_relationships()
+    def get_fixup_callers(self):
+        """Get set_relation and generator function caller, timed when profiling"""
+        # Fixtures of fixup_parallel chunks only go back as rows, so related fixtures are left untouched
+        set_relation = self.set_relation_ids if self.parallel_chunk else self.set_relation
+        if self.profiler is None:
+            return set_relation, self._call_generator_function
 
-        # Get function that sets attribute onto fixture
-        def _get_fn(value, attr, is_relation=False, is_generated=False):
-            def _set_attr_fn(fixture):
-                attr_value = value
-                if is_generated:
-                    attr_value = self._call_generator_function(value, fixture, attr)
-                if is_relation:
-                    self.set_relation(fixture, attr_value, attr)
-                else:
-                    setattr(fixture, attr, attr_value)
+        return (
+            self.profiler.timed(self, 'set_relation', set_relation),
+            self.profiler.timed_generator(self, self._call_generator_function),
+        )
 
-            return _set_attr_fn
+    def invalidate_fixup_plans(self):
+        self._fixup_plans = {}
+        self._fixup_plans_defaults = self.defaults
+        self._fixup_plans_order = self.generated_field_order
 
-        def _dict_as_key(_dict):
-            return str(sorted(iteritems(_dict)))
+    def compile_fixup_plan(self, model_values):
+        relationships = self.get_relationships()
+        plan = FixupPlan()
+        gen_values = {}
+        gen_relations = {}
 
-        # Group into buckets whether attribute value is a relation and is a generator
+        # Group attributes by whether value is a relation and is a generator
         for attr, value in iteritems(model_values):
-            params = {
-                'is_relation': bool(relationships.get(attr)),
-                'is_generated': self._is_generator_function(value),
-            }
-            buckets[_dict_as_key(params)][attr] = _get_fn(value, attr, **params)
+            is_relation = bool(relationships.get(attr))
+            if self._is_generator_function(value):
+                (gen_relations if is_relation else gen_values)[attr] = is_relation
+            elif is_relation:
+                plan.static_relations.append(attr)
+            else:
+                plan.static_values.append(attr)
+
+        # Generated functions are called according to sorted order, but otherwise prioritize relations
+        combined = dict(gen_values, **gen_relations)
+        plan.set_generated(self.sorted_by_generated_order(combined, other_prioritized=set(gen_relations)))
+        return plan
+
+    def get_fixup_plan(self, model_values):
+        # Plans are invalidated when defaults or generated_field_order are reassigned,
+        # in-place changes to either need an explicit call to invalidate_fixup_plans
+        if self._fixup_plans_defaults is not self.defaults or \
+                self._fixup_plans_order is not self.generated_field_order:
+            self.invalidate_fixup_plans()
+
+        # Same attributes can iterate in another order, so the signature doesn't depend on it
+        signature = frozenset(
+            (attr, self._is_generator_function(value))
+            for attr, value in iteritems(model_values)
+        )
+
+        plan = self._fixup_plans.get(signature)
+        if plan is None:
+            plan = self._fixup_plans[signature] = self.compile_fixup_plan(model_values)
+        return plan
+
+    def create_fixture(self, **values):
+        return self.model(**values)
+
+    @profiled('set_fixture_values')
+    def set_fixture_values(self, model_values, fixture=None, plan=None):
+        # Init model if None passed
+        fixture = fixture or self.create_fixture()
+        plan = plan or self.get_fixup_plan(model_values)
+        set_relation, call_generator = self.get_fixup_callers()
 
         # Call static values first
-        bucket = buckets[_dict_as_key({'is_relation': False, 'is_generated': False})]
-        for static_values in itervalues(bucket):
-            static_values(fixture)
+        for attr in plan.static_values:
+            setattr(fixture, attr, model_values[attr])
 
         # Call static relations next
-        bucket = buckets[_dict_as_key({'is_relation': True, 'is_generated': False})]
-        for static_relations in itervalues(bucket):
-            static_relations(fixture)
+        for attr in plan.static_relations:
+            value = model_values[attr]
+            if _tracked_fixtures:
+                value = _untracked(value)
+            set_relation(fixture, value, attr)
+
+        if self.infer_generated_field_order and not plan.inferred:
+            self.infer_generated_order(model_values, fixture, plan)
+            return fixture
+
+        lazy = self.lazy_generated and plan.lazy_generated
+        for attr, is_relation in (plan.eager_generated if lazy else plan.generated):
+            attr_value = call_generator(model_values[attr], fixture, attr)
+            if is_relation:
+                set_relation(fixture, attr_value, attr)
+            else:
+                setattr(fixture, attr, attr_value)
+
+        if lazy:
+            self.defer_generated(fixture, LazyGeneratedValues(self, model_values, list(plan.lazy_generated)))
 
-        # Call generated functions now, according to sorted order, but otherwise prioritize relations
-        gen_values = buckets[_dict_as_key({'is_relation': False, 'is_generated': True})]
-        gen_relations = buckets[_dict_as_key({'is_relation': True, 'is_generated': True})]
+        return fixture
 
-        relation_keys = set(iterkeys(gen_relations))
-        combined = dict(gen_values, **gen_relations)
+    def defer_generated(self, fixture, lazy):
+        """Keep lazy generated values of fixture, to compute them when first read"""
+        fixture._lazy_generated = lazy
+
+    @classmethod
+    def get_generated_attr_sources(cls, attr):
+        """Get attributes whose values set attr"""
+        return (attr,)
+
+    def infer_generated_order(self, model_values, fixture, plan):
+        """Generate values of fixture, generating attributes that generators read before they're used,
+        and save the order they were generated in to plan"""
+        set_relation, call_generator = self.get_fixup_callers()
+        is_relations = dict(plan.generated)
+        order = []
+        generating = []
+
+        def generate(attr):
+            if attr not in is_relations or attr in order:
+                return
+            if attr in generating:
+                cycle = generating[generating.index(attr):] + [attr]
+                raise Exception('Generated attributes of %s depend on each other: %s' % (
+                    self._UPPER_KEY, ' -> '.join(cycle)))
+
+            generating.append(attr)
+            _tracked_fixtures.append(tracked)
+            try:
+                value = call_generator(model_values[attr], tracked, attr)
+            finally:
+                _tracked_fixtures.pop()
+                generating.pop()
+
+            if is_relations[attr]:
+                set_relation(fixture, _untracked(value), attr)
+            else:
+                setattr(fixture, attr, _untracked(value))
+            order.append(attr)
+
+        def on_read(name):
+            for attr in self.get_generated_attr_sources(name):
+                # Generators reading their own attribute get its current value, like without inference
+                if attr != generating[-1]:
+                    generate(attr)
+
+        tracked = _TrackedFixture(fixture, on_read)
+        for attr, is_relation in plan.generated:
+            generate(attr)
+
+        plan.set_generated([(attr, is_relations[attr]) for attr in order])
+        plan.inferred = True
 
-        for attr, generator in self.sorted_by_generated_order(combined, other_prioritized=relation_keys):
-            generator(fixture)
+    @classmethod
+    def resolve_generated(cls, fixture, attr=None):
+        """Compute lazy generated values of fixture, up to attr or all of them"""
+        lazy = getattr(fixture, '_lazy_generated', None)
+        if lazy:
+            lazy.resolve(fixture, attr)
 
-        return fixture
+    def resolve_current_generated(self):
+        """Compute lazy generated values of all fixtures"""
+        for fixture in self.get_all_fixtures():
+            self.resolve_generated(fixture)
 
     @classmethod
     def get_relationships(cls):
         raise NotImplementedError
 
     def sorted_by_generated_order(self, data, other_prioritized={}):
+        field_order = {attr: i for i, attr in reversed(list(enumerate(self.generated_field_order)))}
+
         def _sort(_tuple):
             attr = _tuple[0]
 
-            try:
-                # Attributes in self.generated_field order prioritized before everything else
-                return self.generated_field_order.index(attr)
-            except:
-                # lower number if a prioritized attribute
-                return len(self.generated_field_order) + int(attr not in other_prioritized)
+            # Attributes in self.generated_field order prioritized before everything else
+            if attr in field_order:
+                return field_order[attr]
+            # lower number if a prioritized attribute
+            return len(self.generated_field_order) + int(attr not in other_prioritized)
 
         return sorted(iteritems(data), key=_sort)
 
@@ -325,27 +1167,61 @@ class ModelFixtureUpper(BaseFixtureUpper):
             for key, val in iteritems(d):
                 setattr(fixtures[i], key, val)
 
-    def single_fixup(self, data=None, defaults=None, default_overrides={}, **kwargs):
-        data = data or {}
-
+    def get_model_values(self, data=None, defaults=None, default_overrides={}):
         # Get model values through mix of default values and passed in values
         defaults = dict(defaults or self.defaults, **default_overrides)
-        model_values = dict(defaults, **data)
+        return dict(defaults, **(data or {}))
+
+    def check_required_attributes(self, fixture):
+        # Check to make sure required attibutes have been set
+        for attr in self.required_attributes:
+            if self.lazy_generated:
+                self.resolve_generated(fixture, attr)
+            if getattr(fixture, attr, None) is None:
+                raise Exception('%s is not set for %s' % (attr, str(fixture)))
+
+    @profiled('single_fixup')
+    def single_fixup(self, data=None, defaults=None, default_overrides={}, **kwargs):
+        model_values = self.get_model_values(data, defaults, default_overrides)
 
         # Generate model's primary key value if it has a primary key
         if self.attr_key and not model_values.get(self.attr_key):
             model_values[self.attr_key] = self.get_model_id()
 
         fixture = self.set_fixture_values(model_values)
+        self.check_required_attributes(fixture)
 
-        # Check to make sure required attibutes have been set
-        for attr in self.required_attributes:
-            if getattr(fixture, attr, None) is None:
-                raise Exception('%s is not set for %s' % (attr, str(fixture)))
-
-        self.fixtures.append(fixture)
+        self.add_fixture(fixture)
         return fixture
 
+    @profiled('fixup_many')
+    def fixup_many(self, count, data=None, defaults=None, default_overrides={}, **kwargs):
+        """Fixup count fixtures sharing the same data
+
+        Ids are reserved as one contiguous block before any generator function is called.
+        """
+        model_values = self.get_model_values(data, defaults, default_overrides)
+
+        ids = None
+        if self.attr_key and not model_values.get(self.attr_key):
+            ids = self.reserve_model_ids(count)
+            model_values[self.attr_key] = None
+
+        plan = self.get_fixup_plan(model_values)
+        fixtures = []
+
+        for i in range(count):
+            if ids is not None:
+                model_values[self.attr_key] = ids[i]
+
+            fixture = self.set_fixture_values(model_values, plan=plan)
+            self.check_required_attributes(fixture)
+
+            self.add_fixture(fixture)
+            fixtures.append(fixture)
+
+        return fixtures
+
     def fixup(self, data=None, **kwargs):
         if isinstance(data, list):
             fixtures = []
@@ -354,3 +1230,77 @@ class ModelFixtureUpper(BaseFixtureUpper):
             return fixtures
         else:
             return self.single_fixup(data=data, **kwargs)
+
+    def get_chunk_seed(self, index):
+        if self.seed is None:
+            return None
+        return '%s:%s:%d' % (self.seed, self._UPPER_KEY, index)
+
+    def get_upper(self, key, **kwargs):
+        if self.parallel_chunk and self.upper_aliases.get(key, key) != self._UPPER_KEY:
+            raise Exception('Generators of fixup_parallel cannot fix up fixtures of other uppers, got %s' % key)
+        return super(ModelFixtureUpper, self).get_upper(key, **kwargs)
+
+    def fixup_parallel_chunk(self, index, start_id, count, data=None, savedir=None, **kwargs):
+        # Generate chunk in a fixture upper of its own, with chunk's ids and seed,
+        # isolated the same way whether it runs in a worker process or not
+        upper = type(self)(start_id=start_id, seed=self.get_chunk_seed(index))
+        upper.parallel_chunk = True
+        upper.defaults = self.defaults
+        upper.generated_field_order = self.generated_field_order
+        fixtures = upper.fixup_many(count, data=data, **kwargs)
+
+        # Any other fixture would take ids of other chunks
+        if len(upper.fixtures) != count or upper.attr_key and upper.get_model_id(inc=False) > start_id + count:
+            raise Exception('Generators of fixup_parallel cannot fix up other fixtures')
+
+        if savedir:
+            path = os.path.join(savedir, '%s_%05d.json' % (self._UPPER_KEY, index))
+            self.write_json_breakdown(path, fixtures)
+            return path
+
+        return [self.get_fixture_to_dict(f) for f in fixtures]
+
+    def fixup_parallel(self, count, data=None, workers=None, chunk_size=1000, savedir=None, **kwargs):
+        """Fixup count fixtures sharing the same data, like fixup_many, in a pool of worker processes
+
+        Fixtures are generated in chunks of chunk_size, each with its own block of ids and a seed
+        derived from the upper's seed, so fixtures are the same for any number of workers.
+        Relations only set foreign keys of the fixtures, related fixtures are left untouched,
+        and generator functions cannot fix up other fixtures.
+
+        If savedir is passed, workers write every chunk as a json breakdown in savedir
+        and the paths of the chunks are returned, instead of fixtures.
+        """
+        global _parallel_fixup
+
+        model_values = self.get_model_values(data, kwargs.get('defaults'), kwargs.get('default_overrides', {}))
+        start_id = self._model_id
+        if self.attr_key and not model_values.get(self.attr_key):
+            self.reserve_model_ids(count)
+
+        if savedir and not os.path.exists(savedir):
+            os.makedirs(savedir)
+
+        chunks = [
+            (index, start_id + offset, min(chunk_size, count - offset))
+            for index, offset in enumerate(range(0, count, chunk_size))
+        ]
+
+        _parallel_fixup = (self, dict(kwargs, data=data, savedir=savedir))
+        try:
+            results = _map_in_processes(_fixup_parallel_chunk, chunks, workers or multiprocessing.cpu_count())
+        finally:
+            _parallel_fixup = None
+
+        if savedir:
+            return results
+
+        fixtures = []
+        for rows in results:
+            for row in rows:
+                fixture = self.create_fixture(**row)
+                self.add_fixture(fixture)
+                fixtures.append(fixture)
+
+        return fixtures
@@ -0,0 +1,95 @@
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+
+from copy import deepcopy
+import functools
+from future.utils import iteritems
+from timeit import default_timer
+
+
+def get_upper_key(upper):
+    # Upper key of fixture upper instance or class, or class name of uppers without key
+    return getattr(upper, '_UPPER_KEY', None) or (upper if isinstance(upper, type) else type(upper)).__name__
+
+
+class FixtureProfiler(object):
+    """Call counts and total time of each stage of fixture uppers, per upper key
+
+    Times are inclusive, i.e. time of single_fixup includes time of the generators it calls.
+    callback, if passed, is called with (upper key, stage, seconds) after every timed call.
+    """
+
+    def __init__(self, callback=None, clock=default_timer):
+        self.callback = callback
+        self.clock = clock
+        self.stats = {}
+
+    def record(self, upper_key, stage, elapsed):
+        upper_stats = self.stats.get(upper_key)
+        if upper_stats is None:
+            upper_stats = self.stats[upper_key] = {}
+
+        stage_stats = upper_stats.get(stage)
+        if stage_stats is None:
+            stage_stats = upper_stats[stage] = {'calls': 0, 'time': 0.0}
+
+        stage_stats['calls'] += 1
+        stage_stats['time'] += elapsed
+
+        if self.callback:
+            self.callback(upper_key, stage, elapsed)
+
+    def call(self, upper, stage, fn, *args, **kwargs):
+        start = self.clock()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.record(get_upper_key(upper), stage, self.clock() - start)
+
+    def timed(self, upper, stage, fn):
+        """Get fn, timed as stage of upper"""
+        def _timed(*args, **kwargs):
+            return self.call(upper, stage, fn, *args, **kwargs)
+
+        return _timed
+
+    def timed_generator(self, upper, call_generator_function):
+        """Get generator function caller, timing every generated attribute as its own stage"""
+        def _call(fn, fixture, key):
+            return self.call(upper, 'generate:%s' % key, call_generator_function, fn, fixture, key)
+
+        return _call
+
+    def get_stats(self):
+        """Get {upper key: {stage: {'calls': count, 'time': seconds}}}"""
+        return deepcopy(self.stats)
+
+    def get_slowest(self, count=None):
+        """Get list of (upper key, stage, calls, time) tuples, slowest stages first"""
+        slowest = sorted(
+            (
+                (upper_key, stage, stage_stats['calls'], stage_stats['time'])
+                for upper_key, upper_stats in iteritems(self.stats)
+                for stage, stage_stats in iteritems(upper_stats)
+            ),
+            key=lambda s: -s[3],
+        )
+        return slowest if count is None else slowest[:count]
+
+    def reset(self):
+        self.stats = {}
+
+
+def profiled(stage):
+    """Decorate method of fixture uppers, to time its calls as stage when profiling is enabled"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(upper, *args, **kwargs):
+            profiler = upper.profiler
+            if profiler is None:
+                return fn(upper, *args, **kwargs)
+            return profiler.call(upper, stage, fn, upper, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
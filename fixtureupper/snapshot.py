@@ -0,0 +1,119 @@
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+
+import marshal
+from past.builtins import long
+import struct
+
+
+# Binary breakdown layout: MAGIC, header of format and marshal versions, then marshalled tables.
+# Marshal format changes between python versions, so snapshots of other versions are refused
+MAGIC = b'FXUPSNAP'
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('>HH')
+
+# Column encodings
+_RAW = ''
+_MIXED = '*'
+
+_NATIVE_TYPES = {type(None), bool, int, long, float, type(''), bytes}
+_CONTAINER_TYPES = {list, tuple, dict}
+
+
+def _get_codec(python_type, codecs_by_type):
+    for t in python_type.__mro__:
+        codec = codecs_by_type.get(t)
+        if codec:
+            return codec
+    return None
+
+
+def _encode_value(value, codecs_by_type):
+    python_type = type(value)
+    if python_type in _NATIVE_TYPES:
+        return _RAW, value
+
+    codec = _get_codec(python_type, codecs_by_type)
+    if codec:
+        return codec.name, codec.encode(value)
+
+    if python_type in _CONTAINER_TYPES:
+        try:
+            marshal.dumps(value)
+            return _RAW, value
+        except ValueError:
+            pass
+    raise ValueError('Cannot snapshot value %r, add a json codec for %s' % (value, python_type.__name__))
+
+
+def _encode_column(values, codecs_by_type):
+    types = set(map(type, values))
+
+    if types <= _NATIVE_TYPES:
+        return _RAW, values
+
+    # Column of a single codec type, i.e. datetimes, stores encoded values only
+    types.discard(type(None))
+    if len(types) == 1:
+        codec = codecs_by_type.get(types.pop())
+        if codec:
+            encode = codec.encode
+            return codec.name, [None if v is None else encode(v) for v in values]
+
+    return _MIXED, [_encode_value(v, codecs_by_type) for v in values]
+
+
+def _get_decode(name, codecs):
+    codec = codecs.get(name)
+    if not codec:
+        raise ValueError('Snapshot has values of unknown json codec %s' % name)
+    return codec.decode
+
+
+def _decode_column(encoding, values, codecs):
+    if encoding == _RAW:
+        return values
+
+    if encoding == _MIXED:
+        decoded = []
+        for name, value in values:
+            decoded.append(value if name == _RAW else _get_decode(name, codecs)(value))
+        return decoded
+
+    decode = _get_decode(encoding, codecs)
+    return [None if v is None else decode(v) for v in values]
+
+
+def dumps_snapshot(tables, codecs):
+    """Serialize tables of (model name, row count, column keys, columns) to snapshot bytes
+
+    Values of types in codecs are stored with their codec's encoding
+    """
+    codecs_by_type = {codec.python_type: codec for codec in codecs}
+    payload = [
+        (model_name, count, list(keys), [_encode_column(column, codecs_by_type) for column in columns])
+        for model_name, count, keys, columns in tables
+    ]
+    return MAGIC + _HEADER.pack(FORMAT_VERSION, marshal.version) + marshal.dumps(payload)
+
+
+def loads_snapshot(data, codecs, model_names=None):
+    """Get list of (model name, row count, column keys, columns) tables from snapshot bytes,
+    optionally only tables of model_names"""
+    header_end = len(MAGIC) + _HEADER.size
+    if data[:len(MAGIC)] != MAGIC or len(data) < header_end:
+        raise ValueError('Not a fixture snapshot')
+
+    format_version, marshal_version = _HEADER.unpack(data[len(MAGIC):header_end])
+    if (format_version, marshal_version) != (FORMAT_VERSION, marshal.version):
+        raise ValueError(
+            'Snapshot has format version %s.%s, expected %s.%s'
+            % (format_version, marshal_version, FORMAT_VERSION, marshal.version)
+        )
+
+    tables = []
+    for model_name, count, keys, columns in marshal.loads(data[header_end:]):
+        if model_names is None or model_name in model_names:
+            columns = [_decode_column(encoding, values, codecs) for encoding, values in columns]
+            tables.append((model_name, count, keys, columns))
+    return tables
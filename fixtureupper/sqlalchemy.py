@@ -1,7 +1,7 @@
 from __future__ import (absolute_import, division,
                         print_function, unicode_literals)
 
-from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor
 import datetime
 from decimal import Decimal
 from future.utils import iteritems
@@ -9,60 +9,338 @@ import inspect
 import json
 import operator
 import os
+import weakref
 
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlalchemy.inspection import inspect as sqlalchemy_inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import NEVER_SET, NO_VALUE, instance_dict, instance_state
+from sqlalchemy.orm.base import ATTR_EMPTY, ATTR_WAS_SET
 
 from fixtureupper.model import ModelFixtureUpper
 
 
+class FixtureRow(object):
+    """Lightweight record of the column values of a model, used in place of model instances in row mode
+
+    Relations are kept only as foreign key ids, model instances can be made with materialize
+    """
+    __slots__ = ('_lazy_generated',)
+    _model = None
+    _column_keys = ()
+
+    def __init__(self, **values):
+        for key, value in iteritems(values):
+            setattr(self, key, value)
+
+    def __getattr__(self, name):
+        if name == '_lazy_generated':
+            return None
+
+        if name in self._column_key_set:
+            # Compute lazy generated value on first access
+            lazy = self._lazy_generated
+            if lazy and name in lazy.pending:
+                lazy.resolve(self, name)
+                if name not in lazy.pending:
+                    return getattr(self, name)
+
+            # Unset columns are None, like in model instances
+            return None
+        raise AttributeError(name)
+
+    def __repr__(self):
+        return '<%s row %r>' % (type(self).__name__, self.to_dict())
+
+    def to_dict(self):
+        values = {}
+        for key in self._column_keys:
+            value = getattr(self, key)
+            if value is not None:
+                values[key] = value
+        return values
+
+    def materialize(self):
+        return self._model(**self.to_dict())
+
+
+class _LazyGeneratedLoader(object):
+    """Attribute loader of model instances, computing a lazy generated value when it's first read"""
+
+    def __init__(self, key):
+        self.key = key
+
+    def __call__(self, state, passive):
+        lazy = state.dict.get('_lazy_generated')
+        if lazy:
+            lazy.resolve(state.obj(), self.key)
+        return ATTR_WAS_SET if self.key in state.dict else ATTR_EMPTY
+
+
+def _resolve_generated_before_insert(mapper, connection, target):
+    lazy = instance_dict(target).get('_lazy_generated')
+    if lazy:
+        lazy.resolve(target)
+
+
+class ModelMetadata(object):
+    """Mapper information of a model class, introspected once and shared by all fixtures"""
+
+    def __init__(self, model):
+        mapper = sqlalchemy_inspect(model)
+
+        self.model = model
+        self.mapper = mapper
+        self.table = mapper.local_table
+        self.table_name = self.table.name
+
+        try:
+            self.primary_key = mapper.primary_key[0].name
+        except IndexError:
+            self.primary_key = None
+
+        # Tables referenced by foreign keys of the model's table
+        self.foreign_tables = {fk.column.table for fk in self.table.foreign_keys} - {self.table}
+        # Tables only referenced by nullable or use_alter foreign keys, whose rows can be inserted later
+        self.optional_foreign_tables = self.foreign_tables - {
+            fk.column.table for fk in self.table.foreign_keys
+            if not (fk.use_alter or fk.constraint is not None and fk.constraint.use_alter or fk.parent.nullable)
+        }
+
+        # Attribute keys of mapped columns, along with their columns
+        self.columns = [(prop.key, prop.columns[0]) for prop in mapper.column_attrs]
+        self.column_keys = [key for key, column in self.columns]
+
+        self.relationships = {}
+        self.back_relations = {}
+        self.relation_keys = {}
+        # Relations that set each foreign key
+        self.foreign_key_relations = {}
+
+        for relationship in mapper.relationships:
+            key = relationship.key
+            self.relationships[key] = relationship
+
+            back_relation = relationship.back_populates or relationship.backref
+            if isinstance(back_relation, tuple):
+                back_relation = back_relation[0]
+            self.back_relations[key] = back_relation
+
+            # Foreign key of the model (i.e. Article's main_author_id)
+            # paired with primary key of related model (i.e. Author's id)
+            local_column = list(relationship.local_columns)[0]
+            self.relation_keys[key] = [{
+                'foreign_key': local_column.key,
+                'related_primary_key': list(local_column.foreign_keys)[0].column.key,
+            }] if local_column.foreign_keys else []
+            for k in self.relation_keys[key]:
+                self.foreign_key_relations.setdefault(k['foreign_key'], []).append(key)
+
+        # Fixture uppers of fixtures whose changes are tracked, by fixture
+        self.change_trackers = weakref.WeakKeyDictionary()
+        self.set_listeners = []
+        self.resolves_generated_on_insert = False
+
+        # Record class named after model, so fixture rows break down like model instances
+        self.row_class = type(str(model.__name__), (FixtureRow,), {
+            '__slots__': tuple(str(key) for key in self.column_keys),
+            '_model': model,
+            '_column_keys': tuple(self.column_keys),
+            '_column_key_set': frozenset(self.column_keys),
+        })
+
+    def _get_set_listener(self, key):
+        primary_key = self.primary_key
+        change_trackers = self.change_trackers
+
+        def _on_set(target, value, oldvalue, initiator):
+            tracker = change_trackers.get(target)
+            upper = tracker and tracker()
+            if upper is None:
+                return
+
+            model_name = type(target).__name__
+            if key != primary_key:
+                upper.mark_dirty_key(model_name, instance_dict(target).get(primary_key))
+                return
+
+            # Fixture moves to the shard of its new key, so the shard of its old key changes too
+            if oldvalue is not NO_VALUE and oldvalue is not NEVER_SET:
+                upper.mark_dirty_key(model_name, oldvalue)
+            upper.mark_dirty_key(model_name, value)
+
+        return _on_set
+
+    def track_changes(self, fixture, upper):
+        """Mark fixture as changed in upper whenever one of its mapped columns is set"""
+        if not self.set_listeners:
+            for key in self.column_keys:
+                listener = self._get_set_listener(key)
+                event.listen(getattr(self.model, key), 'set', listener)
+                self.set_listeners.append((key, listener))
+
+        self.change_trackers[fixture] = weakref.ref(upper)
+
+    def resolve_generated_on_insert(self):
+        """Compute lazy generated values of model instances before they're inserted"""
+        if not self.resolves_generated_on_insert:
+            self.resolves_generated_on_insert = True
+            event.listen(self.model, 'before_insert', _resolve_generated_before_insert)
+
+    def untrack_changes(self, fixtures):
+        """Stop tracking changes of fixtures, removing listeners once no fixture is tracked"""
+        for fixture in fixtures:
+            self.change_trackers.pop(fixture, None)
+
+        if not self.change_trackers:
+            for key, listener in self.set_listeners:
+                event.remove(getattr(self.model, key), 'set', listener)
+            self.set_listeners = []
+
+
+_model_metadata = {}
+
+
+def get_model_metadata(model):
+    # Get model class, not instance of model
+    if not inspect.isclass(model):
+        model = type(model)
+    if issubclass(model, FixtureRow):
+        model = model._model
+
+    metadata = _model_metadata.get(model)
+    if metadata is None:
+        metadata = _model_metadata[model] = ModelMetadata(model)
+    return metadata
+
+
 class SqlAlchemyModelFixtureUpper(ModelFixtureUpper):
+    # Generate FixtureRow records instead of model instances
+    row_mode = False
+
+    @classmethod
+    def get_model_metadata(cls, model=None):
+        return get_model_metadata(model or cls.model)
+
+    def create_fixture(self, **values):
+        if self.row_mode:
+            return self.get_model_metadata().row_class(**values)
+        return super(SqlAlchemyModelFixtureUpper, self).create_fixture(**values)
+
+    def add_fixture(self, fixture):
+        # Fixture rows aren't instrumented, their changes are marked with mark_dirty
+        if self.track_changes and not isinstance(fixture, FixtureRow):
+            self.get_model_metadata(fixture).track_changes(fixture, self)
+        super(SqlAlchemyModelFixtureUpper, self).add_fixture(fixture)
+
+    def defer_generated(self, fixture, lazy):
+        super(SqlAlchemyModelFixtureUpper, self).defer_generated(fixture, lazy)
+        if isinstance(fixture, FixtureRow):
+            return
+
+        # Deferred attributes of model instances load their value on first read, and at the latest on flush
+        self.get_model_metadata(fixture).resolve_generated_on_insert()
+        state = instance_state(fixture)
+        if not state.callables:
+            state.callables = {}
+        for attr in lazy.pending:
+            state.callables[attr] = _LazyGeneratedLoader(attr)
+
+    def stop_tracking_changes(self):
+        for upper in self.upper_instances.values():
+            if getattr(upper, 'model', None):
+                self.get_model_metadata(upper.model).untrack_changes(upper.fixtures)
+        super(SqlAlchemyModelFixtureUpper, self).stop_tracking_changes()
+
+    @classmethod
+    def get_fixture_key(cls, fixture):
+        primary_key = cls.get_model_metadata(fixture).primary_key
+        return getattr(fixture, primary_key, None) if primary_key else None
+
+    @classmethod
+    def materialize(cls, fixtures):
+        """Get model instances of fixtures, making them from any fixture rows"""
+        return [f.materialize() if isinstance(f, FixtureRow) else f for f in fixtures]
+
+    @classmethod
+    def get_python_objects_for_json(cls):
+        pos = super(SqlAlchemyModelFixtureUpper, cls).get_python_objects_for_json()
+        pos[FixtureRow] = {
+            'to_json': lambda obj: cls.get_fixture_to_json(obj),
+            'from_json': lambda obj: obj,
+        }
+        return pos
+
+    @classmethod
+    def _get_model_dependencies(cls, attr):
+        metadata_by_name = {
+            name: cls.get_model_metadata(upper_class.model)
+            for name, upper_class in iteritems(cls._upper_classes)
+            if getattr(upper_class, 'model', None)
+        }
+        names_by_table = {metadata.table: name for name, metadata in iteritems(metadata_by_name)}
+
+        # Registered models that model's foreign keys point to
+        return {
+            name: {names_by_table[table] for table in getattr(metadata, attr) if table in names_by_table}
+            for name, metadata in iteritems(metadata_by_name)
+        }
+
+    @classmethod
+    def get_model_dependencies(cls):
+        return cls._get_model_dependencies('foreign_tables')
+
+    @classmethod
+    def get_optional_model_dependencies(cls):
+        return cls._get_model_dependencies('optional_foreign_tables')
+
+    @classmethod
+    def get_generated_attr_sources(cls, attr):
+        return (attr,) + tuple(cls.get_model_metadata().foreign_key_relations.get(attr, ()))
+
     @classmethod
     def get_table_name_from_fixture(cls, f):
-        return type(f).__tablename__
+        return cls.get_model_metadata(f).table_name
+
+    @classmethod
+    def get_breakdown_columns(cls, fixture):
+        # Column names of mapped columns, in table order
+        return [(key, column.name) for key, column in cls.get_model_metadata(fixture).columns]
 
     @classmethod
     def is_removeable_relation(cls, model, relation_prop):
-        return bool(cls._get_relationship(model, relation_prop))
+        return relation_prop in cls.get_model_metadata(model).relationships
 
     @classmethod
     def get_fixture_to_dict(cls, fixture):
-        fields = vars(fixture)
+        if isinstance(fixture, FixtureRow):
+            return fixture.to_dict()
 
-        # Remove relation before writing to prevent circular json
-        removed_relations = {k: v for k, v in iteritems(fields) if cls.is_removeable_relation(fixture, k)}
-        for k, v in iteritems(removed_relations):
-            # delattr removes completely if list, must copy
-            removed_relations[k] = v[:] if isinstance(v, list) else v
-            delattr(fixture, k)
+        # Read mapped columns straight from instance state,
+        # without going through (and firing events of) instrumented attributes
+        state_dict = instance_dict(fixture)
+        if state_dict.get('_lazy_generated'):
+            state_dict['_lazy_generated'].resolve(fixture)
+        fields = {}
 
-        fields = deepcopy(fields)
-        del fields['_sa_instance_state']
-
-        # Delete null values from json
-        remove = [k for k, v in iteritems(fields) if v is None]
-        for k in remove:
-            del fields[k]
-
-        # Reset removed relations
-        for k, v in iteritems(removed_relations):
-            setattr(fixture, k, v)
+        # Leave out null values from json
+        for key in cls.get_model_metadata(fixture).column_keys:
+            value = state_dict.get(key)
+            if value is not None:
+                fields[key] = value
 
         return fields
 
     def get_model_attr_key(self, model=None):
         try:
-            model = model or self.model
-            # Get model class, not instance of model
-            if not inspect.isclass(model):
-                model = type(model)
-            return sqlalchemy_inspect(model).primary_key[0].name
+            return self.get_model_metadata(model).primary_key
         except:
             return None
 
     @classmethod
     def get_relationships(cls, fixture=None):
-        model = type(fixture) if fixture else cls.model
-        return sqlalchemy_inspect(model).relationships
+        return cls.get_model_metadata(fixture).relationships
 
     @classmethod
     def _get_relationship(cls, fixture, relation_prop):
@@ -72,20 +350,7 @@ class SqlAlchemyModelFixtureUpper(ModelFixtureUpper):
         # set fixture's (i.e. Article)
         # foreign_key (i.e. main_author_id)
         # to primary_key of related_fixture (i.e. Author's author_id)
-        relationship = self._get_relationship(fixture, relation_prop)
-        relation_keys = []
-
-        if relationship:
-            local_columns = list(relationship.local_columns)[0]
-
-            # Only get keys if it's a foreign key of the model
-            if local_columns.foreign_keys:
-                relation_keys.append({
-                    'foreign_key': local_columns.key,
-                    'related_primary_key': list(local_columns.foreign_keys)[0].column.key,
-                })
-
-        return relation_keys
+        return self.get_model_metadata(fixture).relation_keys.get(relation_prop, [])
 
     def _set_relation_ids(self, fixture, related_fixture, relation_prop):
         if not related_fixture:
@@ -96,12 +361,132 @@ class SqlAlchemyModelFixtureUpper(ModelFixtureUpper):
 
     def set_relation(self, fixture, related_fixtures, relation_prop):
         # Set fixture relation, backref's automatically made by sqlAlchemy
-        setattr(fixture, relation_prop, related_fixtures)
-        _property = getattr(type(fixture), relation_prop).property
-        back_relation = _property.back_populates or _property.backref
+        # Fixture rows only keep relations as foreign key ids
+        if not isinstance(fixture, FixtureRow):
+            setattr(fixture, relation_prop, related_fixtures)
+        back_relation = self.get_model_metadata(fixture).back_relations[relation_prop]
 
         if not isinstance(related_fixtures, list):
             related_fixtures = [related_fixtures]
         for r in related_fixtures:
+            if r is None:
+                continue
             self._set_relation_ids(fixture, r, relation_prop)
             self._set_relation_ids(r, fixture, back_relation)
+
+    def set_relation_ids(self, fixture, related_fixtures, relation_prop):
+        if related_fixtures is None:
+            return
+
+        if isinstance(related_fixtures, list) or not self.get_relation_keys(fixture, related_fixtures, relation_prop):
+            raise Exception(
+                'Relation %s of %s is not kept in foreign keys of its own, and cannot be set by fixup_parallel'
+                % (relation_prop, type(fixture).__name__)
+            )
+        self._set_relation_ids(fixture, related_fixtures, relation_prop)
+
+    @classmethod
+    def iter_table_batches(cls, model_fixtures, batch_size=1000):
+        """Yield (table, list of insert parameters) batches of fixtures of a single model
+
+        Fixtures are converted one batch at a time, so a batch can be built while the previous one executes.
+        """
+        if batch_size < 1:
+            raise ValueError('batch_size must be a positive number')
+
+        for offset in range(0, len(model_fixtures), batch_size):
+            buffer, = cls.sort_fixtures_by_model(model_fixtures[offset:offset + batch_size]).values()
+            metadata = cls.get_model_metadata(buffer.fixtures[0])
+
+            # Insert same columns as sql breakdown, so unset columns keep their database defaults
+            columns = [(key, column.key) for key, column in metadata.columns if key in buffer.columns]
+            column_keys = [column_key for key, column_key in columns]
+
+            rows = buffer.iter_rows([key for key, column_key in columns])
+            yield metadata.table, [dict(zip(column_keys, values)) for values in rows]
+
+    @classmethod
+    def iter_load_batches(cls, fixtures, batch_size=1000):
+        """Yield (table, list of insert parameters) batches of fixtures, in model order"""
+        for model_name, model_fixtures in cls.group_fixtures_by_model(fixtures):
+            for batch in cls.iter_table_batches(model_fixtures, batch_size=batch_size):
+                yield batch
+
+    @classmethod
+    def load_fixtures(cls, bind, fixtures, batch_size=1000):
+        """Insert fixtures into database with executemany batches of core inserts
+
+        bind can be an engine, in which case the inserts are run in their own transaction,
+        a connection, or a session, which leaves committing to the caller.
+        """
+        if isinstance(bind, Session):
+            bind = bind.connection()
+
+        if isinstance(bind, Engine):
+            with bind.begin() as connection:
+                return cls.load_fixtures(connection, fixtures, batch_size=batch_size)
+
+        for table, params in cls.iter_load_batches(fixtures, batch_size=batch_size):
+            bind.execute(table.insert(), params)
+
+    def load_current_fixtures(self, bind, batch_size=1000):
+        return self.load_fixtures(bind, self.get_all_fixtures(), batch_size=batch_size)
+
+    @classmethod
+    def _load_table(cls, engine, model_fixtures, batch_size):
+        with engine.begin() as connection:
+            for table, params in cls.iter_table_batches(model_fixtures, batch_size=batch_size):
+                connection.execute(table.insert(), params)
+
+    @classmethod
+    def load_fixtures_concurrently(cls, engine, fixtures, workers=None, batch_size=1000):
+        """Insert fixtures with tables of the same dependency level loaded at the same time
+
+        Levels are loaded one after the other. Within a level, each table is inserted by a worker thread
+        on a connection of its own from the engine's pool, in its own transaction, so tables loaded before
+        a failure stay loaded.
+        """
+        groups = dict(cls.group_fixtures_by_model(fixtures))
+        cyclic = sorted(model_name for model_name in cls.get_cyclic_models() if model_name in groups)
+        if cyclic:
+            raise Exception(
+                'Models %s have cyclic dependencies, order them with all_fixtures_order to load them concurrently'
+                % ', '.join(cyclic)
+            )
+
+        levels = [[model_name for model_name in level if model_name in groups] for level in cls.get_model_levels()]
+
+        # Fixtures of models without fixture uppers are loaded last, one table at a time
+        leveled = {model_name for level in levels for model_name in level}
+        levels.extend([model_name] for model_name in sorted(groups) if model_name not in leveled)
+        levels = [level for level in levels if level]
+        if not levels:
+            return
+
+        executor = ThreadPoolExecutor(max_workers=workers or max(len(level) for level in levels))
+        try:
+            for level in levels:
+                futures = [
+                    executor.submit(cls._load_table, engine, groups[model_name], batch_size)
+                    for model_name in level
+                ]
+                # Wait for whole level before loading tables that depend on it
+                for future in futures:
+                    future.result()
+        finally:
+            executor.shutdown(wait=True)
+
+    def load_current_fixtures_concurrently(self, engine, workers=None, batch_size=1000):
+        return self.load_fixtures_concurrently(engine, self.get_all_fixtures(), workers=workers, batch_size=batch_size)
+
+    @classmethod
+    def load_fixtures_async(cls, bind, fixtures, batch_size=1000):
+        """Get coroutine inserting fixtures through an asyncio engine, connection or session
+
+        Needs SqlAlchemy's asyncio extension, see fixtureupper.aio
+        """
+        from fixtureupper.aio import load_fixtures_async
+        return load_fixtures_async(cls, bind, fixtures, batch_size=batch_size)
+
+    def load_current_fixtures_async(self, bind, batch_size=1000):
+        return self.load_fixtures_async(bind, self.get_all_fixtures(), batch_size=batch_size)
@@ -56,6 +56,7 @@ setup(
 
     install_requires=[
         'future >= 0.14.3, < 0.19',
+        'futures; python_version < "3"',
         'SQLAlchemy',
     ],
 
@@ -0,0 +1,30 @@
+"""Coroutines of async load tests, imported only where python supports async syntax"""
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+
+def run_with_async_engine(db_path, coroutine_fn):
+    async_engine = create_async_engine('sqlite+aiosqlite:///%s' % db_path)
+
+    async def _run():
+        try:
+            await coroutine_fn(async_engine)
+        finally:
+            await async_engine.dispose()
+
+    asyncio.run(_run())
+
+
+async def load_into_connection(upper, engine, fixtures, batch_size=1000):
+    async with engine.begin() as connection:
+        await upper.load_fixtures_async(connection, fixtures, batch_size=batch_size)
+
+
+async def load_into_session(upper, engine):
+    async with AsyncSession(engine) as session:
+        await upper.load_current_fixtures_async(session)
+        await session.commit()
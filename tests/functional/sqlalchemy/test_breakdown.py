@@ -1,10 +1,20 @@
 from __future__ import (absolute_import, division,
                         print_function, unicode_literals)
 
+from io import StringIO
 import json
+import os
 import re
+import shutil
+import tempfile
+from unittest import TestCase
+import warnings
 
+from mock import patch
+
+from fixtureupper.register import UpperRegister
 from tests.functional.sqlalchemy import BaseTestCase
+from tests.models import Owner, Pet
 
 
 class TestBreakdown(BaseTestCase):
@@ -28,45 +38,347 @@ class TestBreakdown(BaseTestCase):
     def _standardize_white_space(self, s):
         return re.sub(re.compile('^[ ]+', re.MULTILINE), '', s.strip())
 
+    def test_model_ranks_from_foreign_keys(self):
+        self.assertEqual(self.m_fu.get_model_ranks(), {'Author': 0, 'Article': 1, 'CoWrite': 2, 'Draft': 3})
+
+    def test_get_fixture_to_dict(self):
+        au_fixture = self.au_fu.fixtures[0]
+        au_fixture.alias = None
+        articles = list(au_fixture.articles)
+
+        self.assertEqual(self.m_fu.get_fixture_to_dict(au_fixture), {'id': 150})
+        self.assertEqual(
+            self.m_fu.get_fixture_to_dict(articles[0]),
+            {'id': 250, 'main_author_id': 150},
+        )
+        self.assertEqual(au_fixture.articles, articles)
+        self.assertIs(articles[0].author, au_fixture)
+
     def test_get_current_fixtures_json(self):
+        # Authors come first, as articles have a foreign key to them
         json_dict = json.loads(self.m_fu.get_current_json_breakdown())
-        self.assertEqual(json_dict, self.json_dict)
+        expected_json_dict = self.json_dict[3:] + self.json_dict[:3]
+        self.assertEqual(json_dict, expected_json_dict)
+
+    def test_json_breakdown_matches_json_dumps(self):
+        fixtures = self.m_fu.get_all_fixtures()
+        self.assertEqual(
+            self.m_fu.breakdown_to_json(fixtures),
+            json.dumps(fixtures, indent=4, default=self.m_fu.get_default_to_json(), sort_keys=True),
+        )
+        self.assertEqual(self.m_fu.breakdown_to_json([]), json.dumps([], indent=4))
+
+    def test_write_json_breakdown(self):
+        fout = StringIO()
+        self.m_fu.write_json_breakdown(fout, self.m_fu.get_all_fixtures())
+        self.assertEqual(fout.getvalue(), self.m_fu.get_current_json_breakdown())
+
+    def test_print_json_breakdown(self):
+        savedir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, savedir)
+
+        self.m_fu.print_json_breakdown(os.path.join(savedir, 'new'), 'breakdown.json', self.m_fu.get_all_fixtures())
+        with open(os.path.join(savedir, 'new', 'breakdown.json')) as fin:
+            self.assertEqual(fin.read(), self.m_fu.get_current_json_breakdown())
+
+    def test_iter_json_breakdown(self):
+        fout = StringIO(self.m_fu.get_current_json_breakdown())
+        fixtures = list(self.m_fu.iter_json_breakdown(fout))
+
+        self.assertEqual(
+            [(type(f).__name__, f.id) for f in fixtures],
+            [('Author', 150), ('Author', 151), ('Article', 250), ('Article', 251), ('Article', 252)],
+        )
+        self.assertEqual(fixtures[4].title, 'some title')
+        self.assertEqual(fixtures[4].main_author_id, 151)
+
+    def test_iter_json_breakdown_of_classes(self):
+        savedir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, savedir)
+        self.m_fu.print_json_breakdown(savedir, 'breakdown.json', self.m_fu.get_all_fixtures())
+        fname = os.path.join(savedir, 'breakdown.json')
+
+        fixtures = list(self.m_fu.iter_json_breakdown(fname, classes=['Author']))
+        self.assertEqual([(type(f).__name__, f.id) for f in fixtures], [('Author', 150), ('Author', 151)])
+
+        fixtures = list(self.m_fu.iter_json_breakdown(fname, classes=[self.ArticleFixtureUpperClass.model]))
+        self.assertEqual([f.id for f in fixtures], [250, 251, 252])
+
+    def test_binary_breakdown(self):
+        savedir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, savedir)
+        self.m_fu.print_binary_breakdown(savedir, 'breakdown.bin', self.m_fu.get_all_fixtures())
+        fname = os.path.join(savedir, 'breakdown.bin')
+
+        fixtures = self.m_fu.read_binary_breakdown(fname)
+        self.assertEqual(
+            [(type(f).__name__, self.m_fu.get_fixture_to_dict(f)) for f in fixtures],
+            [(type(f).__name__, self.m_fu.get_fixture_to_dict(f)) for f in self.m_fu.get_all_fixtures()],
+        )
+        self.assertEqual(self.m_fu.breakdown_to_json(fixtures), self.m_fu.get_current_json_breakdown())
+
+        fixtures = self.m_fu.read_binary_breakdown(fname, classes=[self.AuthorFixtureUpperClass.model])
+        self.assertEqual([(type(f).__name__, f.id) for f in fixtures], [('Author', 150), ('Author', 151)])
+
+    def test_binary_breakdown_of_unregistered_model(self):
+        data = self.m_fu.breakdown_to_binary(self.m_fu.get_all_fixtures())
+        del self.SqlAlchemyModelFixtureUpper._upper_classes['Article']
+        with self.assertRaises(ValueError):
+            self.m_fu.fixup_from_binary(data)
+
+    def _print_delimited_breakdown(self, **kwargs):
+        savedir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, savedir)
+        manifest = self.m_fu.print_delimited_breakdown(savedir, self.m_fu.get_all_fixtures(), **kwargs)
+
+        with open(os.path.join(savedir, 'manifest.json')) as fin:
+            self.assertEqual(json.load(fin), manifest)
+
+        files = {}
+        for table in manifest['tables']:
+            with open(os.path.join(savedir, table['file'])) as fin:
+                files[table['file']] = fin.read()
+        return manifest, files
+
+    def test_copy_breakdown(self):
+        self.ar_fu.fixtures[0].title = 'tab\there'
+        manifest, files = self._print_delimited_breakdown()
+
+        self.assertEqual(manifest, {
+            'format': 'text',
+            'tables': [
+                {
+                    'model': 'Author',
+                    'table': 'author',
+                    'file': 'author.copy',
+                    'columns': ['id', 'name', 'alias'],
+                    'rows': 2,
+                    'copy': 'COPY author (id, name, alias) FROM STDIN',
+                },
+                {
+                    'model': 'Article',
+                    'table': 'article',
+                    'file': 'article.copy',
+                    'columns': ['id', 'title', 'sub_title', 'main_author_id', 'is_visible'],
+                    'rows': 3,
+                    'copy': 'COPY article (id, title, sub_title, main_author_id, is_visible) FROM STDIN',
+                },
+            ],
+        })
+        self.assertEqual(files, {
+            'author.copy': '150\t\\N\t\\N\n151\t\\N\t\\N\n',
+            'article.copy': (
+                '250\ttab\\there\t\\N\t150\t\\N\n'
+                '251\t\\N\t\\N\t150\t\\N\n'
+                '252\tsome title\t\\N\t151\tt\n'
+            ),
+        })
+
+    def test_csv_breakdown(self):
+        self.SqlAlchemyModelFixtureUpper.all_fixtures_order = ['Article', 'Author']
+        manifest, files = self._print_delimited_breakdown(format='csv')
+
+        self.assertEqual([table['file'] for table in manifest['tables']], ['article.csv', 'author.csv'])
+        self.assertEqual(
+            manifest['tables'][0]['copy'],
+            'COPY article (id, title, sub_title, main_author_id, is_visible) FROM STDIN WITH (FORMAT csv, HEADER true)',
+        )
+        self.assertEqual(files, {
+            'author.csv': 'id,name,alias\n150,,\n151,,\n',
+            'article.csv': (
+                'id,title,sub_title,main_author_id,is_visible\n'
+                '250,,,150,\n251,,,150,\n252,"some title",,151,t\n'
+            ),
+        })
+
+    def test_delimited_breakdown_converts_fixtures_as_rows_are_written(self):
+        with patch.object(self.SqlAlchemyModelFixtureUpper, 'sort_fixtures_by_model') as sort_fixtures_by_model:
+            manifest, files = self._print_delimited_breakdown()
+        self.assertFalse(sort_fixtures_by_model.called)
+
+        chunks = self.m_fu.iter_delimited_chunks(
+            self.ar_fu.fixtures, self.m_fu.get_breakdown_columns(self.ar_fu.fixtures[0]), format='csv',
+        )
+        self.assertEqual(next(chunks), 'id,title,sub_title,main_author_id,is_visible\n')
+        self.assertEqual(next(chunks), '250,,,150,\n')
+
+    def _fixture_values(self, fixtures):
+        return [(type(f).__name__, self.m_fu.get_fixture_to_dict(f)) for f in fixtures]
+
+    def test_sharded_breakdown(self):
+        savedir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, savedir)
+        fixtures = self.m_fu.get_all_fixtures()
+
+        shard_index = self.m_fu.print_sharded_breakdown(savedir, fixtures, rows_per_shard=2, workers=2)
+        self.assertEqual(shard_index['format'], 'json')
+        self.assertEqual([(entry['model'], entry['file'], entry['rows']) for entry in shard_index['shards']], [
+            ('Author', 'Author_00000.json', 2),
+            ('Article', 'Article_00000.json', 2),
+            ('Article', 'Article_00001.json', 1),
+        ])
+        with open(os.path.join(savedir, 'index.json')) as fin:
+            self.assertEqual(json.load(fin), shard_index)
+        with open(os.path.join(savedir, 'Article_00001.json')) as fin:
+            self.assertEqual(fin.read(), self.m_fu.breakdown_to_json(fixtures[-1:]))
+
+        fixtures_read = self.m_fu.read_sharded_breakdown(savedir)
+        self.assertEqual(self._fixture_values(fixtures_read), self._fixture_values(fixtures))
+        self.assertEqual(
+            [f.id for f in self.m_fu.read_sharded_breakdown(savedir, classes=[self.ArticleFixtureUpperClass.model])],
+            [250, 251, 252],
+        )
+
+    def test_sharded_breakdown_in_processes(self):
+        fixtures = self.m_fu.get_all_fixtures()
+        for format in ['json', 'sql', 'binary']:
+            results = []
+            for workers in [1, 3]:
+                savedir = tempfile.mkdtemp()
+                self.addCleanup(shutil.rmtree, savedir)
+                self.m_fu.print_sharded_breakdown(savedir, fixtures, format=format, rows_per_shard=1, workers=workers)
+                self.assertEqual(len(os.listdir(savedir)), 6)
+
+                if format == 'binary':
+                    # Marshal output depends on which strings are shared, compare fixtures read back instead
+                    results.append(self._fixture_values(self.m_fu.read_sharded_breakdown(savedir)))
+                    continue
+
+                shard_files = {}
+                for fname in os.listdir(savedir):
+                    with open(os.path.join(savedir, fname)) as fin:
+                        shard_files[fname] = fin.read()
+                results.append(shard_files)
+
+            self.assertEqual(results[0], results[1])
+
+    def test_sharded_breakdown_per_model(self):
+        savedir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, savedir)
+        fixtures = self.m_fu.get_all_fixtures()
+
+        shard_index = self.m_fu.print_sharded_breakdown(savedir, fixtures, format='binary')
+        self.assertEqual([entry['file'] for entry in shard_index['shards']], ['Author_00000.bin', 'Article_00000.bin'])
+        self.assertEqual(
+            self._fixture_values(self.m_fu.read_sharded_breakdown(savedir, classes=['Author'])),
+            self._fixture_values(fixtures[:2]),
+        )
+
+        self.m_fu.print_sharded_breakdown(savedir, fixtures, format='sql')
+        with open(os.path.join(savedir, 'Author_00000.sql')) as fin:
+            self.assertEqual(fin.read(), self.m_fu.breakdown_to_sql(fixtures[:2]))
+        with self.assertRaises(ValueError):
+            self.m_fu.read_sharded_breakdown(savedir)
+
+        with self.assertRaises(ValueError):
+            self.m_fu.print_sharded_breakdown(savedir, fixtures, format='xml')
 
     def test_get_fixtures_json_in_different_order(self):
-        self.SqlAlchemyModelFixtureUpper.all_fixtures_order = ['Author', 'Article']
+        self.SqlAlchemyModelFixtureUpper.all_fixtures_order = ['Article', 'Author']
         json_dict = json.loads(self.m_fu.get_current_json_breakdown())
-        expected_json_dict = self.json_dict[3:] + self.json_dict[:3]
-        self.assertEqual(json_dict, expected_json_dict)
+        self.assertEqual(json_dict, self.json_dict)
 
     def test_writes_as_sql(self):
         query = self.m_fu.get_current_sql_breakdown()
         self.assertEqual(
             self._standardize_white_space(query),
             self._standardize_white_space("""
+                INSERT INTO author (id) VALUES
+                (150),
+                (151);
+
                 INSERT INTO article (id, is_visible, main_author_id, title) VALUES
                 (250, NULL, 150, NULL),
                 (251, NULL, 150, NULL),
                 (252, true, 151, 'some title');
-
-                INSERT INTO author (id) VALUES
-                (150),
-                (151);
             """)
         )
 
+    def test_writes_as_sql_with_bounded_inserts(self):
+        query = self.m_fu.get_current_sql_breakdown(rows_per_insert=2)
+        self.assertEqual(query, (
+            'INSERT INTO author (id) VALUES\n'
+            '(150),\n'
+            '(151);\n'
+            '\n'
+            'INSERT INTO article (id, is_visible, main_author_id, title) VALUES\n'
+            '(250, NULL, 150, NULL),\n'
+            '(251, NULL, 150, NULL);\n'
+            '\n'
+            'INSERT INTO article (id, is_visible, main_author_id, title) VALUES\n'
+            "(252, true, 151, 'some title');\n"
+        ))
+
+        with self.assertRaises(ValueError):
+            self.m_fu.get_current_sql_breakdown(rows_per_insert=0)
+
+    def test_sql_breakdown_converts_one_table_at_a_time(self):
+        converted = []
+        get_fixture_to_dict = self.m_fu.get_fixture_to_dict
+
+        def _get_fixture_to_dict(f):
+            converted.append(type(f).__name__)
+            return get_fixture_to_dict(f)
+
+        with patch.object(self.SqlAlchemyModelFixtureUpper, 'get_fixture_to_dict', side_effect=_get_fixture_to_dict):
+            chunks = self.m_fu.iter_sql_breakdown_chunks(self.m_fu.get_all_fixtures())
+            self.assertEqual(next(chunks), 'INSERT INTO author (id) VALUES\n')
+            self.assertEqual(converted, ['Author', 'Author'])
+
+            ''.join(chunks)
+            self.assertEqual(converted, ['Author'] * 2 + ['Article'] * 3)
+
+    def test_writes_no_sql_without_fixtures(self):
+        self.assertEqual(self.m_fu.breakdown_to_sql([]), '')
+
+    def test_write_sql_breakdown(self):
+        fout = StringIO()
+        self.m_fu.write_sql_breakdown(fout, self.m_fu.get_all_fixtures(), rows_per_insert=1)
+        self.assertEqual(fout.getvalue(), self.m_fu.get_current_sql_breakdown(rows_per_insert=1))
+
     def test_writes_as_sql_in_different_order(self):
-        self.SqlAlchemyModelFixtureUpper.all_fixtures_order = ['Author', 'Article']
+        self.SqlAlchemyModelFixtureUpper.all_fixtures_order = ['Article', 'Author']
         query = self.m_fu.get_current_sql_breakdown()
         self.assertEqual(
             self._standardize_white_space(query),
             self._standardize_white_space("""
-                INSERT INTO author (id) VALUES
-                (150),
-                (151);
-
                 INSERT INTO article (id, is_visible, main_author_id, title) VALUES
                 (250, NULL, 150, NULL),
                 (251, NULL, 150, NULL),
                 (252, true, 151, 'some title');
+
+                INSERT INTO author (id) VALUES
+                (150),
+                (151);
             """)
         )
+
+
+class TestCyclicBreakdown(TestCase):
+    def setUp(self):
+        self.SqlAlchemyModelFixtureUpper = UpperRegister('SqlAlchemyModel')
+
+        class OwnerFixtureUpper(self.SqlAlchemyModelFixtureUpper):
+            model = Owner
+            defaults = {}
+
+        class PetFixtureUpper(self.SqlAlchemyModelFixtureUpper):
+            model = Pet
+            defaults = {}
+
+        self.m_fu = self.SqlAlchemyModelFixtureUpper(start_id=10)
+        self.owner = self.m_fu.get_upper('Owner').fixup(data={'pet_id': 20})
+        self.pet = self.m_fu.get_upper('Pet', start_id=20).fixup(data={'owner_id': 10})
+
+    def test_orders_models_with_cyclic_foreign_keys(self):
+        # use_alter foreign key of Pet is dropped to break the cycle
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            self.assertEqual(self.m_fu.get_all_fixtures(), [self.pet, self.owner])
+        self.assertIn('Models Pet have cyclic dependencies', str(caught[0].message))
+
+        self.assertEqual(self.m_fu.get_cyclic_models(), {'Pet'})
+        self.assertEqual(
+            [f['__class__'] for f in json.loads(self.m_fu.get_current_json_breakdown())],
+            ['Pet', 'Owner'],
+        )
@@ -0,0 +1,158 @@
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+
+import os
+import shutil
+import tempfile
+
+from fixtureupper.cache import FixupCache
+from fixtureupper.sqlalchemy import get_model_metadata
+from tests.functional.sqlalchemy import BaseTestCase
+from tests.models import Article, Author
+
+
+def build(m_fu, count):
+    au_fixtures = m_fu.get_upper('Author').fixup_many(2, data={
+        'name': lambda self, fixture, k: 'Author %s' % self.randint(0, 10 ** 9),
+    })
+    m_fu.get_upper('Article').fixup_many(count, data={'author': au_fixtures[1], 'title': 'Title'})
+
+
+class TestFixupCache(BaseTestCase):
+    def setUp(self):
+        super(TestFixupCache, self).setUp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        self.cache = FixupCache(self.cache_dir)
+
+    def _new_upper(self, seed='seed'):
+        m_fu = self.SqlAlchemyModelFixtureUpper(start_id=150, seed=seed)
+        m_fu.get_upper('Author')
+        m_fu.get_upper('Article', start_id=250)
+        m_fu.get_upper('Draft', start_id=300)
+        m_fu.get_upper('CoWrite', start_id=370)
+        return m_fu
+
+    def _values(self, fixtures):
+        return [(type(f).__name__, self.m_fu.get_fixture_to_dict(f)) for f in fixtures]
+
+    def test_keys_unseeded_uppers_by_their_definitions(self):
+        self.assertEqual(
+            self.cache.get_key(self._new_upper(seed=None), build, (3,)),
+            self.cache.get_key(self._new_upper(seed=None), build, (3,)),
+        )
+
+    def test_builds_then_reads_fixtures(self):
+        built_fu = self._new_upper()
+        fixtures = self.cache.fixup(built_fu, build, 3)
+        self.assertEqual(fixtures, built_fu.get_all_fixtures())
+        self.assertEqual(len(self.cache.get_entries()), 1)
+
+        m_fu = self._new_upper()
+        cached_fixtures = self.cache.fixup(m_fu, build, 3)
+        self.assertEqual(self._values(cached_fixtures), self._values(fixtures))
+        self.assertEqual(self._values(m_fu.get_all_fixtures()), self._values(fixtures))
+        self.assertEqual(len(self.cache.get_entries()), 1)
+
+        # Built and cached fixtures alike only have foreign key ids of relations
+        for f in [fixtures[-1], cached_fixtures[-1]]:
+            self.assertEqual(f.main_author_id, 151)
+            self.assertIsNone(f.author)
+        self.assertEqual([f.articles for f in fixtures[:2]], [[], []])
+
+        # Uppers continue where the build left off
+        au_fu = built_fu.get_upper('Author')
+        self.assertEqual(m_fu.get_upper('Author').fixup().id, au_fu.fixup().id)
+        self.assertEqual(m_fu.get_upper('Author').randint(0, 10 ** 9), au_fu.randint(0, 10 ** 9))
+        self.assertEqual(m_fu.get_upper('Article').fixup().id, 253)
+
+    def _attributes(self, fixtures):
+        # Column values along with related fixtures, by model and id
+        def _ids(related):
+            related = related if isinstance(related, list) else [related] if related is not None else []
+            return [(type(r).__name__, r.id) for r in related]
+
+        return [
+            (type(f).__name__, self.m_fu.get_fixture_to_dict(f), {
+                key: _ids(getattr(f, key)) for key in get_model_metadata(f).relationships
+            })
+            for f in fixtures
+        ]
+
+    def test_miss_and_hit_give_same_fixtures(self):
+        built = self._attributes(self.cache.fixup(self._new_upper(), build, 3))
+        self.assertEqual(self._attributes(self.cache.fixup(self._new_upper(), build, 3)), built)
+
+    def test_rebuilds_corrupt_entries(self):
+        key = self.cache.get_key(self._new_upper(), build, (3,))
+        fixtures = self.cache.fixup(self._new_upper(), build, 3)
+
+        bin_path = os.path.join(self.cache_dir, key + '.bin')
+        with open(bin_path, 'rb') as fin:
+            data = fin.read()
+
+        for corrupt_data in [data[:len(data) // 2], data[:-1], b'']:
+            with open(bin_path, 'wb') as fout:
+                fout.write(corrupt_data)
+
+            self.assertIsNone(self.cache.load(self._new_upper(), key))
+            self.assertEqual(self._values(self.cache.fixup(self._new_upper(), build, 3)), self._values(fixtures))
+
+    def test_removes_partial_writes(self):
+        with self.assertRaises(TypeError):
+            self.cache._write('key', '.bin', None, 'wb')
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_misses_with_other_definitions(self):
+        key = self.cache.get_key(self._new_upper(), build, (3,))
+        self.assertEqual(self.cache.get_key(self._new_upper(), build, (3,)), key)
+
+        self.assertNotEqual(self.cache.get_key(self._new_upper(), build, (4,)), key)
+        self.assertNotEqual(self.cache.get_key(self._new_upper(seed='other seed'), build, (3,)), key)
+
+        m_fu = self._new_upper()
+        m_fu.get_upper('Author').randint(0, 10)
+        self.assertNotEqual(self.cache.get_key(m_fu, build, (3,)), key)
+
+        self.AuthorFixtureUpperClass.defaults = {'alias': 'Alias'}
+        self.assertNotEqual(self.cache.get_key(self._new_upper(), build, (3,)), key)
+
+        self.AuthorFixtureUpperClass.defaults = {'alias': lambda self, fixture, k: 'Alias'}
+        other_key = self.cache.get_key(self._new_upper(), build, (3,))
+        self.AuthorFixtureUpperClass.defaults = {'alias': lambda self, fixture, k: 'Other alias'}
+        self.assertNotEqual(self.cache.get_key(self._new_upper(), build, (3,)), other_key)
+
+        self.assertNotEqual(FixupCache(self.cache_dir, version=2).get_key(self._new_upper(), build, (3,)), key)
+
+    def test_rows_from_cache(self):
+        key = self.cache.get_key(self._new_upper(), build, (3,))
+        self.cache.fixup(self._new_upper(), build, 3)
+
+        self.SqlAlchemyModelFixtureUpper.row_mode = True
+        fixtures = self.cache.load(self._new_upper(), key)
+        self.assertEqual(
+            [type(f) for f in fixtures],
+            [get_model_metadata(Author).row_class] * 2 + [get_model_metadata(Article).row_class] * 3,
+        )
+        self.assertEqual([f.id for f in fixtures], [150, 151, 250, 251, 252])
+        self.assertEqual(fixtures[-1].main_author_id, 151)
+
+    def test_evicts_least_recently_used(self):
+        cache = FixupCache(self.cache_dir, max_entries=2)
+        keys = []
+        for count in range(3):
+            keys.append(cache.get_key(self._new_upper(), build, (count,)))
+            cache.fixup(self._new_upper(), build, count)
+            os.utime(os.path.join(self.cache_dir, keys[-1] + '.json'), (count, count))
+
+        self.assertEqual([key for _, _, key in cache.get_entries()], keys[1:])
+
+        # Reading entry makes it most recently used
+        cache.fixup(self._new_upper(), build, 1)
+        cache.fixup(self._new_upper(), build, 3)
+        self.assertEqual(len(cache.get_entries()), 2)
+        self.assertEqual(cache.get_entries()[0][2], keys[1])
+
+        cache = FixupCache(self.cache_dir, max_bytes=1)
+        cache.evict()
+        self.assertEqual(cache.get_entries(), [])
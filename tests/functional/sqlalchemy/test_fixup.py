@@ -1,12 +1,20 @@
 from __future__ import (absolute_import, division,
                         print_function, unicode_literals)
 from future.utils import iteritems
+import datetime
+from decimal import Decimal
 import json
+import os
+import shutil
+import tempfile
 
 from mock import patch
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
 
 from fixtureupper.defaults import inherit
 from tests.functional.sqlalchemy import BaseTestCase
+from tests.models import _Base
 
 
 class TestFixup(BaseTestCase):
@@ -78,6 +86,114 @@ class TestFixup(BaseTestCase):
         self.assertIsNone(fixtures[2].name)
         self.assertEqual(fixtures[2].id, 152)
 
+    def test_fixes_up_many_fixtures(self):
+        self.au_fu.fixup()
+        fixtures = self.au_fu.fixup_many(3, data={
+            'name': lambda self, fixture, k: 'Author %s' % fixture.id,
+        }, default_overrides={'alias': 'Alias'})
+        self.assertEqual(self.au_fu.fixtures[1:], fixtures)
+
+        self.assertEqual([f.id for f in fixtures], [151, 152, 153])
+        self.assertEqual([f.name for f in fixtures], ['Author 151', 'Author 152', 'Author 153'])
+        self.assertEqual([f.alias for f in fixtures], ['Alias'] * 3)
+        self.assertEqual(self.au_fu.fixup().id, 154)
+
+    def test_fixes_up_many_fixtures_with_relation(self):
+        au_fixture = self.au_fu.fixup()
+        fixtures = self.ar_fu.fixup_many(2, data={'author': au_fixture})
+        self.assertEqual(au_fixture.articles, fixtures)
+        self.assertEqual([f.main_author_id for f in fixtures], [150, 150])
+
+    def test_fixes_up_many_fixtures_with_required_attributes(self):
+        self.AuthorFixtureUpperClass.required_attributes = ['name']
+        with self.assertRaises(Exception):
+            self.au_fu.fixup_many(2)
+
+    def _fixup_parallel(self, **kwargs):
+        m_fu = self.SqlAlchemyModelFixtureUpper(start_id=10, seed='seed')
+        au_fu = m_fu.get_upper('Author')
+        au_fu.fixup()
+        au_fixtures = au_fu.fixup_parallel(10, chunk_size=3, data={
+            'name': lambda self, fixture, k: 'Author %s' % self.randint(0, 10 ** 9),
+        }, **kwargs)
+        return au_fu, au_fixtures
+
+    def test_fixes_up_fixtures_in_parallel(self):
+        au_fu, au_fixtures = self._fixup_parallel(workers=1)
+        self.assertEqual(au_fu.fixtures[1:], au_fixtures)
+        self.assertEqual([f.id for f in au_fixtures], list(range(11, 21)))
+        self.assertEqual(len({f.name for f in au_fixtures}), 10)
+        self.assertEqual(au_fu.fixup().id, 21)
+
+        for workers in [2, 4]:
+            _au_fu, _au_fixtures = self._fixup_parallel(workers=workers)
+            self.assertEqual(
+                [(f.id, f.name) for f in _au_fixtures],
+                [(f.id, f.name) for f in au_fixtures],
+            )
+
+    def test_fixes_up_related_fixtures_in_parallel(self):
+        results = []
+        for workers in [1, 4]:
+            m_fu = self.SqlAlchemyModelFixtureUpper(start_id=10, seed='seed')
+            au_fixture = m_fu.get_upper('Author').fixup()
+            ar_fixtures = m_fu.get_upper('Article', start_id=20).fixup_parallel(6, chunk_size=2, workers=workers, data={
+                'author': au_fixture,
+                'title': lambda self, fixture, k: 'Title %s' % self.randint(0, 10 ** 9),
+            })
+
+            # Related fixtures are left untouched however chunks are run
+            self.assertEqual(au_fixture.articles, [])
+            self.assertEqual(len(m_fu.get_all_fixtures()), 7)
+            results.append([(f.id, f.title, f.main_author_id) for f in ar_fixtures])
+
+        self.assertEqual(results[0], results[1])
+        self.assertEqual([main_author_id for _, _, main_author_id in results[0]], [10] * 6)
+
+    def test_fixes_up_no_other_fixtures_in_parallel(self):
+        au_fixture = self.au_fu.fixup()
+        for data in [
+            {'author': lambda self, fixture, k: self.get_upper('Author').fixup()},
+            {'title': lambda self, fixture, k: self.fixup().title},
+        ]:
+            with self.assertRaises(Exception):
+                self.ar_fu.fixup_parallel(2, workers=1, data=data)
+
+        with self.assertRaises(Exception):
+            self.au_fu.fixup_parallel(2, workers=1, data={'articles': [self.ar_fu.fixup()]})
+        self.assertEqual(au_fixture.articles, [])
+
+    def test_fixes_up_fixtures_in_parallel_into_breakdowns(self):
+        savedir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, savedir)
+
+        au_fu, au_fixtures = self._fixup_parallel(workers=1)
+        au_fu, paths = self._fixup_parallel(workers=2, savedir=savedir)
+        self.assertEqual([os.path.basename(path) for path in paths], [
+            'Author_00000.json', 'Author_00001.json', 'Author_00002.json', 'Author_00003.json',
+        ])
+
+        fixtures = [f for path in paths for f in au_fu.iter_json_breakdown(path)]
+        self.assertEqual([(f.id, f.name) for f in fixtures], [(f.id, f.name) for f in au_fixtures])
+
+    def test_get_all_fixtures(self):
+        ar_fixture_1 = self.ar_fu.fixup()
+        au_fixture_1 = self.au_fu.fixup()
+        ar_fixture_2, ar_fixture_3 = self.ar_fu.fixup_many(2)
+        au_fixture_2 = self.au_fu.fixup()
+
+        self.assertEqual(self.m_fu.get_all_fixtures(), [
+            au_fixture_1, au_fixture_2, ar_fixture_1, ar_fixture_2, ar_fixture_3,
+        ])
+
+    def test_get_all_fixtures_of_uppers_made_directly(self):
+        ar_fixture = self.ar_fu.fixup()
+        au_fu = self.AuthorFixtureUpperClass(start_id=400, upper_instances=self.m_fu.upper_instances)
+        au_fixture = au_fu.fixup()
+
+        self.assertEqual(self.m_fu.get_all_fixtures(), [au_fixture, ar_fixture])
+        self.assertEqual(au_fu.get_all_fixtures(), [au_fixture, ar_fixture])
+
     def _assert_relations_and_ids(self, au_fixture, ar_fixture):
         self.assertEqual(au_fixture.articles[0], ar_fixture)
         self.assertEqual(ar_fixture.author, au_fixture)
@@ -253,6 +369,163 @@ class TestFixup(BaseTestCase):
                 'title': raiseExceptionIfNoAuthor,
             })
 
+    def _fixup_lazy(self, **kwargs):
+        self.ArticleFixtureUpperClass.lazy_generated = True
+        calls = []
+
+        def title(self, fixture, k):
+            calls.append(k)
+            return 'Title %s' % fixture.id
+
+        def sub_title(self, fixture, k):
+            calls.append(k)
+            return 'Sub title of %s' % fixture.title
+
+        self.ar_fu.generated_field_order = ['author', 'title', 'sub_title']
+        au_fixture = self.au_fu.fixup()
+        ar_fixtures = self.ar_fu.fixup_many(2, data=dict({
+            'author': lambda self, fixture, k: au_fixture,
+            'title': title,
+            'sub_title': sub_title,
+        }, **kwargs))
+        return calls, ar_fixtures
+
+    def test_defers_lazy_generated_values(self):
+        calls, ar_fixtures = self._fixup_lazy()
+
+        # Generated relations are still set right away
+        self.assertEqual(calls, [])
+        self.assertEqual([f.main_author_id for f in ar_fixtures], [150, 150])
+
+        self.ar_fu.resolve_generated(ar_fixtures[0], 'title')
+        self.assertEqual(calls, ['title'])
+
+        self.assertEqual(self.ar_fu.get_fixture_to_dict(ar_fixtures[0])['sub_title'], 'Sub title of Title 250')
+        self.assertEqual(calls, ['title', 'sub_title'])
+
+        json.loads(self.m_fu.get_current_json_breakdown())
+        self.assertEqual(calls, ['title', 'sub_title'] * 2)
+        self.assertEqual(ar_fixtures[1].sub_title, 'Sub title of Title 251')
+
+    def test_resolves_lazy_values_of_instances_on_access(self):
+        calls, ar_fixtures = self._fixup_lazy()
+
+        self.assertEqual(ar_fixtures[1].sub_title, 'Sub title of Title 251')
+        self.assertEqual(calls, ['title', 'sub_title'])
+        self.assertEqual(ar_fixtures[1].title, 'Title 251')
+        self.assertEqual(calls, ['title', 'sub_title'])
+
+    def test_resolves_lazy_values_of_instances_on_flush(self):
+        calls, ar_fixtures = self._fixup_lazy()
+        engine = create_engine('sqlite://')
+        _Base.metadata.create_all(engine)
+
+        ar_fixtures[0].author.name = 'Author'
+        session = sessionmaker(bind=engine)()
+        session.add_all(ar_fixtures)
+        session.flush()
+        self.assertEqual(calls, ['title', 'sub_title'] * 2)
+        self.assertEqual(
+            [tuple(row) for row in session.execute(text('SELECT id, title, sub_title FROM article ORDER BY id'))],
+            [(250, 'Title 250', 'Sub title of Title 250'), (251, 'Title 251', 'Sub title of Title 251')],
+        )
+        session.close()
+
+    def test_resolves_lazy_required_attributes(self):
+        self.ArticleFixtureUpperClass.required_attributes = ['title']
+        calls, ar_fixtures = self._fixup_lazy()
+        self.assertEqual(calls, ['title', 'title'])
+
+        self.ar_fu.resolve_current_generated()
+        self.assertEqual(calls, ['title', 'title', 'sub_title', 'sub_title'])
+
+    def test_resolves_lazy_values_of_rows_on_access(self):
+        self.SqlAlchemyModelFixtureUpper.row_mode = True
+        calls, ar_fixtures = self._fixup_lazy()
+        self.assertEqual(calls, [])
+
+        self.assertEqual(ar_fixtures[1].sub_title, 'Sub title of Title 251')
+        self.assertEqual(calls, ['title', 'sub_title'])
+        self.assertEqual(ar_fixtures[0].to_dict(), {
+            'id': 250, 'main_author_id': 150, 'title': 'Title 250', 'sub_title': 'Sub title of Title 250',
+        })
+
+    def test_infers_generated_field_order(self):
+        self.ArticleFixtureUpperClass.infer_generated_field_order = True
+        au_fixture = self.au_fu.fixup()
+        fixture_types = []
+
+        def sub_title(self, fixture, k):
+            fixture_types.append(type(fixture))
+            return 'Sub title of %s' % fixture.title
+
+        self.ar_fu.generated_field_order = ['sub_title', 'title']
+        data = {
+            'sub_title': sub_title,
+            'title': lambda self, fixture, k: 'Title of %s' % fixture.main_author_id,
+            'author': lambda self, fixture, k: au_fixture,
+        }
+        ar_fixtures = self.ar_fu.fixup(data=[data, data])
+
+        self.assertEqual([f.sub_title for f in ar_fixtures], ['Sub title of Title of 150'] * 2)
+        self.assertEqual(
+            self.ar_fu.get_fixup_plan(dict(self.ar_fu.get_model_values(data), id=250)).generated,
+            [('author', True), ('title', False), ('sub_title', False)],
+        )
+
+        # Generators only get a tracked fixture on first fixup
+        self.assertNotEqual(fixture_types[0], self.ArticleFixtureUpperClass.model)
+        self.assertEqual(fixture_types[1], self.ArticleFixtureUpperClass.model)
+
+    def test_infers_generated_field_order_with_fixture_passed_to_other_uppers(self):
+        self.AuthorFixtureUpperClass.infer_generated_field_order = True
+        au_fixture = self.au_fu.fixup(data={
+            'articles': lambda self, fixture, k: self.get_upper('Article').fixup_many(2, data={'author': fixture}),
+            'name': lambda self, fixture, k: 'Author of %s' % len(fixture.articles),
+        })
+        self.assertEqual(au_fixture.name, 'Author of 2')
+        self.assertEqual([f.author for f in au_fixture.articles], [au_fixture] * 2)
+
+    def test_infers_cyclic_generated_field_order(self):
+        self.ArticleFixtureUpperClass.infer_generated_field_order = True
+        # Cycle is reported from the first attribute generated
+        self.ar_fu.generated_field_order = ['title']
+        with self.assertRaises(Exception) as cm:
+            self.ar_fu.fixup(data={
+                'title': lambda self, fixture, k: fixture.sub_title,
+                'sub_title': lambda self, fixture, k: fixture.is_visible,
+                'is_visible': lambda self, fixture, k: bool(fixture.title),
+            })
+        self.assertIn('title -> sub_title -> is_visible -> title', str(cm.exception))
+
+    def test_profiles_fixups(self):
+        callback_stages = set()
+        profiler = self.m_fu.enable_profiling(callback=lambda upper_key, stage, time: callback_stages.add(stage))
+        self.assertIs(self.ar_fu.profiler, profiler)
+
+        au_fixture = self.au_fu.fixup(data={'name': lambda self, fixture, k: 'Name'})
+        self.ar_fu.fixup_many(2, data={'author': au_fixture, 'title': lambda self, fixture, k: 'Title'})
+        self.m_fu.breakdown_to_sql(self.m_fu.get_all_fixtures())
+
+        stats = profiler.get_stats()
+        self.assertEqual(
+            {stage: s['calls'] for stage, s in stats['Author'].items()},
+            {'single_fixup': 1, 'set_fixture_values': 1, 'generate:name': 1},
+        )
+        self.assertEqual(
+            {stage: s['calls'] for stage, s in stats['Article'].items()},
+            {'fixup_many': 1, 'set_fixture_values': 2, 'set_relation': 2, 'generate:title': 2},
+        )
+        self.assertEqual(
+            {stage: s['calls'] for stage, s in stats['SqlAlchemyModelFixtureUpper'].items()},
+            {'breakdown_to_sql': 1, 'sort_fixtures_by_model': 2},
+        )
+        self.assertEqual(callback_stages, {stage for upper_stats in stats.values() for stage in upper_stats})
+
+        self.m_fu.disable_profiling()
+        self.au_fu.fixup()
+        self.assertEqual(profiler.get_stats(), stats)
+
     def test_fixup_from_json(self):
         json_str = json.dumps(self.json_dict)
         fixtures = self.m_fu.fixup_from_json(json_str)
@@ -268,3 +541,43 @@ class TestFixup(BaseTestCase):
 
         self.assertEqual(fixtures[3].id, 150)
         self.assertEqual(fixtures[4].id, 151)
+
+    def test_fixup_from_json_with_python_objects(self):
+        values = self.m_fu.fixup_from_json(json.dumps([
+            {'__class__': 'datetime', '__value__': 'datetime.datetime(2016, 1, 2, 3, 4)'},
+            {'__class__': 'datetime', '__value__': '2016-01-02T03:04:05'},
+            {'__class__': 'Decimal', '__value__': "Decimal('1.50')"},
+            {'__class__': 'Decimal', '__value__': '1.50'},
+            {'__class__': 'date', '__value__': '2016-01-02'},
+            {'__class__': 'Unknown', '__value__': 'value'},
+        ]))
+
+        self.assertEqual(values, [
+            datetime.datetime(2016, 1, 2, 3, 4),
+            datetime.datetime(2016, 1, 2, 3, 4, 5),
+            Decimal('1.50'),
+            Decimal('1.50'),
+            datetime.date(2016, 1, 2),
+            {'__class__': 'Unknown', '__value__': 'value'},
+        ])
+
+    def test_python_objects_to_json(self):
+        to_json = self.m_fu.get_default_to_json()
+        self.assertEqual(
+            to_json(datetime.datetime(2016, 1, 2, 3, 4)),
+            {'__class__': 'datetime', '__value__': '2016-01-02T03:04:00'},
+        )
+        self.assertEqual(to_json(Decimal('1.50')), {'__class__': 'Decimal', '__value__': '1.50'})
+
+    def test_json_transforms_updated_with_new_uppers(self):
+        python_objects, by_name = self.m_fu.get_json_transforms()
+        self.assertEqual(self.m_fu.get_json_transforms(), (python_objects, by_name))
+        self.assertNotIn('Model', by_name)
+
+        class Model(object):
+            pass
+
+        class ModelFixtureUpper(self.SqlAlchemyModelFixtureUpper):
+            model = Model
+
+        self.assertIn('Model', self.m_fu.get_json_transforms()[1])
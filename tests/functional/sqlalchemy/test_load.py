@@ -0,0 +1,189 @@
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+
+import os
+import shutil
+import tempfile
+from unittest import skipIf
+import warnings
+
+from mock import patch
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from fixtureupper.register import UpperRegister
+from tests.functional.sqlalchemy import BaseTestCase
+from tests.models import _Base, Article, Author, Owner, Pet
+
+# Async syntax doesn't parse before python 3.5
+try:
+    import aiosqlite
+    from tests.functional.sqlalchemy import aio_helpers
+except (ImportError, SyntaxError):
+    aio_helpers = None
+
+
+class BaseLoadTestCase(BaseTestCase):
+    def setUp(self):
+        super(BaseLoadTestCase, self).setUp()
+        self.engine = self.create_engine()
+        _Base.metadata.create_all(self.engine)
+
+        au_fixtures = self.au_fu.fixup(data=[{'name': 'Author 1'}, {'name': 'Author 2', 'alias': 'Alias'}])
+        self.ar_fu.fixup(data=[
+            {'title': 'Title 1', 'author': au_fixtures[0], 'is_visible': True},
+            {'title': 'Title 2', 'author': au_fixtures[1]},
+            {'title': 'Title 3'},
+        ])
+
+    def create_engine(self):
+        return create_engine('sqlite://')
+
+    def _query(self, sql):
+        return [tuple(row) for row in self.engine.execute(sql)]
+
+    def _assert_loaded(self):
+        self.assertEqual(self._query('SELECT id, name, alias FROM author ORDER BY id'), [
+            (150, 'Author 1', None),
+            (151, 'Author 2', 'Alias'),
+        ])
+        self.assertEqual(self._query('SELECT id, title, main_author_id, is_visible FROM article ORDER BY id'), [
+            (250, 'Title 1', 150, 1),
+            (251, 'Title 2', 151, None),
+            (252, 'Title 3', None, None),
+        ])
+
+
+class TestLoad(BaseLoadTestCase):
+    def test_load_into_engine(self):
+        self.m_fu.load_current_fixtures(self.engine, batch_size=2)
+        self._assert_loaded()
+
+    def test_load_into_connection(self):
+        with self.engine.begin() as connection:
+            self.m_fu.load_fixtures(connection, self.m_fu.get_all_fixtures())
+        self._assert_loaded()
+
+    def test_load_into_session(self):
+        session = sessionmaker(bind=self.engine)()
+        self.m_fu.load_current_fixtures(session)
+        session.commit()
+
+        self._assert_loaded()
+        self.assertEqual(session.query(Article).get(250).author, session.query(Author).get(150))
+        session.close()
+
+    def test_load_batches(self):
+        batches = list(self.m_fu.iter_load_batches(self.m_fu.get_all_fixtures(), batch_size=2))
+        self.assertEqual([(table.name, len(params)) for table, params in batches], [
+            ('author', 2),
+            ('article', 2),
+            ('article', 1),
+        ])
+        self.assertEqual(batches[1][1][0], {'id': 250, 'title': 'Title 1', 'main_author_id': 150, 'is_visible': True})
+
+    def test_load_batches_convert_fixtures_one_batch_at_a_time(self):
+        batches = self.m_fu.iter_load_batches(self.m_fu.get_all_fixtures(), batch_size=2)
+        with patch.object(
+            self.SqlAlchemyModelFixtureUpper, 'get_fixture_to_dict', wraps=self.m_fu.get_fixture_to_dict,
+        ) as get_fixture_to_dict:
+            next(batches)
+            self.assertEqual(get_fixture_to_dict.call_count, 2)
+            next(batches)
+            self.assertEqual(get_fixture_to_dict.call_count, 4)
+
+
+class BaseFileLoadTestCase(BaseLoadTestCase):
+    def create_engine(self):
+        # Database all connections can share
+        savedir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, savedir)
+        self.db_path = os.path.join(savedir, 'fixtures.db')
+        return create_engine('sqlite:///%s' % self.db_path)
+
+
+class TestLoadConcurrently(BaseFileLoadTestCase):
+    def test_model_levels(self):
+        self.assertEqual(self.m_fu.get_model_levels(), [['Author'], ['Article'], ['CoWrite', 'Draft']])
+
+        self.SqlAlchemyModelFixtureUpper.all_fixtures_order = ['Article', 'Author']
+        self.assertEqual(self.m_fu.get_model_levels(), [['Article'], ['Author'], ['CoWrite', 'Draft']])
+
+    def test_refuses_cyclic_models(self):
+        CyclicFixtureUpper = UpperRegister('SqlAlchemyModel')
+
+        class OwnerFixtureUpper(CyclicFixtureUpper):
+            model = Owner
+            defaults = {}
+
+        class PetFixtureUpper(CyclicFixtureUpper):
+            model = Pet
+            defaults = {}
+
+        m_fu = CyclicFixtureUpper(start_id=10)
+        fixtures = [
+            m_fu.get_upper('Owner').fixup(data={'pet_id': 10}),
+            m_fu.get_upper('Pet').fixup(data={'owner_id': 10}),
+        ]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            with self.assertRaises(Exception) as cm:
+                m_fu.load_fixtures_concurrently(self.engine, fixtures)
+        self.assertIn('Models Pet have cyclic dependencies', str(cm.exception))
+
+    def test_load_concurrently(self):
+        articles = self.ar_fu.fixtures
+        self.dr_fu.fixup_many(3, data={'title': 'Draft', 'article': articles[0]})
+        self.co_fu.fixup_many(2, data={'article': articles[1], 'author': articles[1].author})
+
+        statements = []
+
+        @event.listens_for(self.engine, 'before_cursor_execute')
+        def record_statement(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('INSERT'):
+                statements.append(statement.split()[2])
+
+        self.m_fu.load_current_fixtures_concurrently(self.engine, batch_size=2)
+        self._assert_loaded()
+        self.assertEqual(self._query('SELECT id, article_id FROM draft ORDER BY id'), [
+            (300, 250),
+            (301, 250),
+            (302, 250),
+        ])
+        self.assertEqual(self._query('SELECT id, article_id, author_id FROM co_write ORDER BY id'), [
+            (370, 251, 151),
+            (371, 251, 151),
+        ])
+
+        # Levels are loaded one after the other
+        self.assertEqual(statements[:3], ['author', 'article', 'article'])
+        self.assertEqual(sorted(statements[3:]), ['co_write', 'draft', 'draft'])
+
+    def test_load_nothing_concurrently(self):
+        self.m_fu.load_fixtures_concurrently(self.engine, [])
+        self.assertEqual(self._query('SELECT id FROM author'), [])
+
+
+@skipIf(aio_helpers is None, 'Needs SqlAlchemy asyncio extension and aiosqlite')
+class TestLoadAsync(BaseFileLoadTestCase):
+    def _run(self, coroutine_fn):
+        aio_helpers.run_with_async_engine(self.db_path, coroutine_fn)
+
+    def test_load_into_async_engine(self):
+        self._run(lambda engine: self.m_fu.load_current_fixtures_async(engine, batch_size=2))
+        self._assert_loaded()
+
+    def test_load_into_async_connection(self):
+        fixtures = self.m_fu.get_all_fixtures()
+        self._run(lambda engine: aio_helpers.load_into_connection(self.m_fu, engine, fixtures, batch_size=1))
+        self._assert_loaded()
+
+    def test_load_into_async_session(self):
+        self._run(lambda engine: aio_helpers.load_into_session(self.m_fu, engine))
+        self._assert_loaded()
+
+    def test_rolls_back_failed_load(self):
+        self.au_fu.fixup(data={'id': 150})
+        with self.assertRaises(Exception):
+            self._run(lambda engine: self.m_fu.load_current_fixtures_async(engine, batch_size=1))
+        self.assertEqual(self._query('SELECT id FROM author'), [])
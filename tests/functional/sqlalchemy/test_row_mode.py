@@ -0,0 +1,79 @@
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+
+from sqlalchemy import create_engine
+
+from fixtureupper.register import UpperRegister
+from fixtureupper.sqlalchemy import FixtureRow
+from tests.functional.sqlalchemy import BaseTestCase
+from tests.models import _Base, Article, Author
+
+
+class TestRowMode(BaseTestCase):
+    def _fixup(self, m_fu):
+        au_fu = m_fu.get_upper('Author')
+        ar_fu = m_fu.get_upper('Article', start_id=250)
+
+        au_fixtures = au_fu.fixup(data=[{'name': 'Author 1'}, {'name': 'Author 2', 'alias': 'Alias'}])
+        ar_fu.fixup_many(2, data={
+            'title': lambda self, fixture, k: 'Title %s' % fixture.id,
+            'author': au_fixtures[1],
+        })
+        ar_fu.fixup(data={'title': 'Title 3', 'is_visible': True})
+        return m_fu.get_all_fixtures()
+
+    def _fixup_rows(self):
+        self.SqlAlchemyModelFixtureUpper.row_mode = True
+        return self._fixup(self.m_fu)
+
+    def _fixup_models(self):
+        Upper = UpperRegister('SqlAlchemyModel')
+
+        class AuthorFixtureUpper(Upper):
+            model = Author
+
+        class ArticleFixtureUpper(Upper):
+            model = Article
+
+        m_fu = Upper(start_id=150)
+        return m_fu, self._fixup(m_fu)
+
+    def test_fixes_up_rows(self):
+        fixtures = self._fixup_rows()
+
+        self.assertTrue(all(isinstance(f, FixtureRow) for f in fixtures))
+        self.assertEqual([type(f).__name__ for f in fixtures], ['Author'] * 2 + ['Article'] * 3)
+        self.assertEqual([f.id for f in fixtures], [150, 151, 250, 251, 252])
+        self.assertEqual([f.main_author_id for f in fixtures[2:]], [151, 151, None])
+        self.assertEqual(fixtures[2].title, 'Title 250')
+        self.assertIsNone(fixtures[2].is_visible)
+
+        with self.assertRaises(AttributeError):
+            fixtures[2].author
+        with self.assertRaises(AttributeError):
+            fixtures[2].author = fixtures[1]
+
+    def test_row_breakdowns_match_models(self):
+        rows = self._fixup_rows()
+        m_fu, models = self._fixup_models()
+
+        self.assertEqual(self.m_fu.breakdown_to_json(rows), m_fu.breakdown_to_json(models))
+        self.assertEqual(self.m_fu.breakdown_to_sql(rows), m_fu.breakdown_to_sql(models))
+
+    def test_materializes_rows(self):
+        fixtures = self.m_fu.materialize(self._fixup_rows())
+
+        self.assertEqual([type(f) for f in fixtures], [Author] * 2 + [Article] * 3)
+        self.assertEqual(fixtures[3].id, 251)
+        self.assertEqual(fixtures[3].title, 'Title 251')
+        self.assertEqual(fixtures[3].main_author_id, 151)
+
+    def test_loads_rows(self):
+        engine = create_engine('sqlite://')
+        _Base.metadata.create_all(engine)
+
+        self.m_fu.load_fixtures(engine, self._fixup_rows())
+        self.assertEqual(
+            [tuple(row) for row in engine.execute('SELECT id, title, main_author_id FROM article ORDER BY id')],
+            [(250, 'Title 250', 151), (251, 'Title 251', 151), (252, 'Title 3', None)],
+        )
@@ -0,0 +1,118 @@
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+
+import os
+import pickle
+import shutil
+import tempfile
+
+from mock import patch
+from sqlalchemy import event
+
+from fixtureupper.sqlalchemy import get_model_metadata
+from tests.functional.sqlalchemy import BaseTestCase
+from tests.models import Author
+
+
+class TestTrackChanges(BaseTestCase):
+    def setUp(self):
+        super(TestTrackChanges, self).setUp()
+        self.SqlAlchemyModelFixtureUpper.track_changes = True
+        self.m_fu = self.SqlAlchemyModelFixtureUpper(start_id=150)
+        self.addCleanup(self.m_fu.stop_tracking_changes)
+        self.au_fu = self.m_fu.get_upper('Author')
+        self.ar_fu = self.m_fu.get_upper('Article', start_id=250)
+
+        self.authors = self.au_fu.fixup_many(2, data={'name': 'Author'})
+        self.articles = self.ar_fu.fixup_many(3, data={'title': 'Title', 'author': self.authors[0]})
+
+        self.savedir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.savedir)
+
+    def _print_breakdown(self, **kwargs):
+        # Get files of shards written
+        with patch.object(
+            self.SqlAlchemyModelFixtureUpper, '_write_shard', wraps=self.SqlAlchemyModelFixtureUpper._write_shard,
+        ) as write_shard:
+            self.m_fu.print_current_sharded_breakdown(self.savedir, workers=1, **kwargs)
+        return sorted(os.path.basename(c[0][0]) for c in write_shard.call_args_list)
+
+    def _read(self, fname):
+        with open(os.path.join(self.savedir, fname)) as fin:
+            return fin.read()
+
+    def test_tracks_created_and_changed_fixtures(self):
+        self.assertEqual(self.m_fu.get_dirty(), {'Author': {150, 151}, 'Article': {250, 251, 252}})
+
+        self.m_fu.clear_dirty()
+        self.articles[1].title = 'Other title'
+        self.authors[1].id = 160
+        self.assertEqual(self.m_fu.get_dirty(), {'Article': {251}, 'Author': {151, 160}})
+
+    def test_tracked_fixtures_pickle_alone(self):
+        untracked = pickle.dumps(Author(id=151, name='Author'))
+        self.assertEqual(len(pickle.dumps(self.authors[1])), len(untracked))
+
+    def test_stop_tracking_changes(self):
+        metadata = get_model_metadata(Author)
+        listeners = list(metadata.set_listeners)
+        self.assertTrue(listeners)
+
+        self.m_fu.stop_tracking_changes()
+        self.assertEqual(metadata.set_listeners, [])
+        for key, listener in listeners:
+            self.assertFalse(event.contains(getattr(Author, key), 'set', listener))
+
+        self.authors[1].name = 'Other name'
+        self.assertEqual(self.m_fu.get_dirty(), {})
+
+    def test_ignores_changes_without_tracking(self):
+        self.SqlAlchemyModelFixtureUpper.track_changes = False
+        m_fu = self.SqlAlchemyModelFixtureUpper(start_id=150)
+        author = m_fu.get_upper('Author').fixup()
+        author.name = 'Other name'
+        self.assertEqual(m_fu.get_dirty(), {})
+
+        with self.assertRaises(ValueError):
+            m_fu.print_current_sharded_breakdown(self.savedir, incremental=True)
+
+    def test_incremental_breakdown(self):
+        self.assertEqual(
+            self._print_breakdown(incremental=True, rows_per_shard=2),
+            ['Article_00000.json', 'Article_00001.json', 'Author_00000.json'],
+        )
+        self.assertEqual(self._print_breakdown(incremental=True, rows_per_shard=2), [])
+
+        self.articles[2].title = 'Other title'
+        self.assertEqual(self._print_breakdown(incremental=True, rows_per_shard=2), ['Article_00001.json'])
+        self.assertIn('Other title', self._read('Article_00001.json'))
+
+        # New fixtures only rewrite the shards they're added to
+        self.ar_fu.fixup_many(2, data={'title': 'Title', 'author': self.authors[1]})
+        self.assertEqual(
+            self._print_breakdown(incremental=True, rows_per_shard=2),
+            ['Article_00001.json', 'Article_00002.json'],
+        )
+
+        fixtures = self.m_fu.read_sharded_breakdown(self.savedir)
+        self.assertEqual(
+            [(type(f).__name__, self.m_fu.get_fixture_to_dict(f)) for f in fixtures],
+            [(type(f).__name__, self.m_fu.get_fixture_to_dict(f)) for f in self.m_fu.get_all_fixtures()],
+        )
+
+        # Shards holding other fixtures are rewritten, and shards no longer in the index removed
+        self.assertEqual(self._print_breakdown(incremental=True), ['Article_00000.json'])
+        self.assertEqual(sorted(os.listdir(self.savedir)), ['Article_00000.json', 'Author_00000.json', 'index.json'])
+
+    def test_incremental_breakdown_of_rows(self):
+        self.SqlAlchemyModelFixtureUpper.row_mode = True
+        self.m_fu = self.SqlAlchemyModelFixtureUpper(start_id=150)
+        rows = self.m_fu.get_upper('Author').fixup_many(2, data={'name': 'Author'})
+        self._print_breakdown(incremental=True)
+
+        rows[0].name = 'Other name'
+        self.assertEqual(self._print_breakdown(incremental=True), [])
+
+        self.m_fu.mark_dirty(rows[0])
+        self.assertEqual(self._print_breakdown(incremental=True), ['Author_00000.json'])
+        self.assertIn('Other name', self._read('Author_00000.json'))
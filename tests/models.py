@@ -46,3 +46,19 @@ class CoWrite(_Base):
 
     author_id = Column(Integer, ForeignKey('author.id'))
     author = relation('Author', backref='co_writes')
+
+
+_CyclicBase = declarative_base()
+
+class Owner(_CyclicBase):
+    __tablename__ = 'owner'
+
+    id = Column(Integer, primary_key=True)
+    pet_id = Column(Integer, ForeignKey('pet.id'), nullable=False)
+
+
+class Pet(_CyclicBase):
+    __tablename__ = 'pet'
+
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey('owner.id', use_alter=True, name='fk_pet_owner'), nullable=False)
@@ -0,0 +1,43 @@
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+
+import datetime
+from decimal import Decimal
+from unittest import TestCase
+
+from fixtureupper.delimited import CSV, get_copy_statement, get_value_encoder
+from fixtureupper.json_codecs import default_json_codecs
+
+
+class TestDelimited(TestCase):
+    def test_encodes_copy_text(self):
+        encode = get_value_encoder(default_json_codecs)
+        self.assertEqual(
+            [
+                encode(v)
+                for v in [None, True, False, 1, 2.5, float('inf'), '', 'a\\b\tc\nd\re', bytearray(b'\x01\xff')]
+            ],
+            ['\\N', 't', 'f', '1', '2.5', 'Infinity', '', 'a\\\\b\\tc\\nd\\re', '\\\\x01ff'],
+        )
+        self.assertEqual(encode(datetime.datetime(2016, 1, 2, 3, 4, 5)), '2016-01-02T03:04:05')
+        self.assertEqual(encode(Decimal('1.50')), '1.50')
+        self.assertEqual(encode({'a': [1, '\n']}), '{"a": [1, "\\\\n"]}')
+
+    def test_encodes_csv(self):
+        encode = get_value_encoder(default_json_codecs, format=CSV)
+        self.assertEqual(
+            [encode(v) for v in [None, True, 1, '', 'say "hi",\nbye', bytearray(b'\x01\xff')]],
+            ['', 't', '1', '""', '"say ""hi"",\nbye"', '\\x01ff'],
+        )
+        self.assertEqual(encode(Decimal('1.50')), '"1.50"')
+
+    def test_refuses_unknown_format(self):
+        with self.assertRaises(ValueError):
+            get_value_encoder(default_json_codecs, format='xml')
+
+    def test_get_copy_statement(self):
+        self.assertEqual(get_copy_statement('author', ['id', 'name']), 'COPY author (id, name) FROM STDIN')
+        self.assertEqual(
+            get_copy_statement('author', ['id'], format=CSV),
+            'COPY author (id) FROM STDIN WITH (FORMAT csv, HEADER true)',
+        )
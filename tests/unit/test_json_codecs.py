@@ -0,0 +1,143 @@
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+
+import datetime
+from decimal import Decimal
+from io import StringIO
+import json
+from six import text_type
+from unittest import TestCase
+import uuid
+
+from fixtureupper.json_codecs import (
+    FixedOffset,
+    JsonCodecRegistry,
+    default_json_codecs,
+    iter_json_array,
+    parse_date,
+    parse_datetime,
+    parse_decimal,
+    parse_time,
+    timezone,
+    utc,
+)
+
+
+class TestParsers(TestCase):
+    def test_parse_datetime(self):
+        self.assertEqual(parse_datetime('2016-01-02T03:04:05'), datetime.datetime(2016, 1, 2, 3, 4, 5))
+        self.assertEqual(parse_datetime('2016-01-02T03:04:05.000006'), datetime.datetime(2016, 1, 2, 3, 4, 5, 6))
+        self.assertEqual(
+            parse_datetime('2016-01-02T03:04:05-05:30'),
+            datetime.datetime(2016, 1, 2, 3, 4, 5, tzinfo=timezone(-datetime.timedelta(hours=5, minutes=30))),
+        )
+
+    def test_fixed_offset(self):
+        # Used as timezone on python 2
+        tzinfo = FixedOffset(-datetime.timedelta(hours=5, minutes=30))
+        value = datetime.datetime(2016, 1, 2, 3, 4, 5, tzinfo=tzinfo)
+        self.assertEqual(value.isoformat(), '2016-01-02T03:04:05-05:30')
+        self.assertEqual(parse_datetime(value.isoformat()), value)
+        self.assertEqual(value.tzname(), 'UTC-05:30')
+        self.assertEqual(FixedOffset(datetime.timedelta(0)).tzname(None), 'UTC')
+        self.assertEqual(tzinfo, FixedOffset(-datetime.timedelta(hours=5, minutes=30)))
+
+    def test_parse_legacy_datetime(self):
+        self.assertEqual(parse_datetime('datetime.datetime(2016, 1, 2, 3, 4)'), datetime.datetime(2016, 1, 2, 3, 4))
+        self.assertEqual(
+            parse_datetime('datetime.datetime(2016, 1, 2, 3, 4, 5, 6, tzinfo=datetime.timezone.utc)'),
+            datetime.datetime(2016, 1, 2, 3, 4, 5, 6, tzinfo=utc),
+        )
+
+        with self.assertRaises(ValueError):
+            parse_datetime('datetime.datetime(2016, 1, 2, __import__("os"))')
+
+    def test_parse_legacy_datetime_with_offset(self):
+        value = parse_datetime(
+            'datetime.datetime(2016, 1, 2, 3, 4, 5, tzinfo=datetime.timezone(datetime.timedelta(seconds=3600)))'
+        )
+        self.assertEqual(value, datetime.datetime(2016, 1, 2, 2, 4, 5, tzinfo=utc))
+        self.assertEqual(value.utcoffset(), datetime.timedelta(hours=1))
+
+        # Positional timedelta repr of python 3.6 and older
+        value = parse_datetime('datetime.datetime(2016, 1, 2, tzinfo=datetime.timezone(datetime.timedelta(0, 3600)))')
+        self.assertEqual(value.utcoffset(), datetime.timedelta(hours=1))
+
+    def test_parse_legacy_datetime_with_named_offset(self):
+        value = parse_datetime(
+            'datetime.datetime(2016, 1, 2, 3, 4, 5, '
+            'tzinfo=datetime.timezone(datetime.timedelta(days=-1, seconds=68400), \'EST\'))'
+        )
+        self.assertEqual(value.utcoffset(), -datetime.timedelta(hours=5))
+        self.assertEqual(value.tzname(), 'EST')
+        self.assertEqual(value, datetime.datetime(2016, 1, 2, 8, 4, 5, tzinfo=utc))
+
+    def test_parse_legacy_datetime_with_fold(self):
+        value = parse_datetime(
+            'datetime.datetime(2016, 11, 6, 1, 30, fold=1, tzinfo=datetime.timezone(datetime.timedelta(seconds=3600)))'
+        )
+        self.assertEqual(value.replace(tzinfo=None), datetime.datetime(2016, 11, 6, 1, 30))
+        self.assertEqual(value.utcoffset(), datetime.timedelta(hours=1))
+        self.assertEqual(getattr(value, 'fold', 1), 1)
+
+        with self.assertRaises(ValueError):
+            parse_datetime('datetime.datetime(2016, 1, 2, tzinfo=datetime.timezone(datetime.timedelta(hours=1)))')
+
+    def test_parse_date_and_time(self):
+        self.assertEqual(parse_date('2016-01-02'), datetime.date(2016, 1, 2))
+        self.assertEqual(parse_time('03:04:05.000006'), datetime.time(3, 4, 5, 6))
+
+        with self.assertRaises(ValueError):
+            parse_date('not a date')
+
+    def test_parse_decimal(self):
+        self.assertEqual(parse_decimal('1.50'), Decimal('1.50'))
+        self.assertEqual(parse_decimal("Decimal('1.50')"), Decimal('1.50'))
+
+    def test_round_trip(self):
+        for value in [
+            datetime.datetime(2016, 1, 2, 3, 4, 5, 6, tzinfo=utc),
+            datetime.date(2016, 1, 2),
+            datetime.time(3, 4, 5),
+            Decimal('-0.010'),
+            uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        ]:
+            codec = default_json_codecs.get(type(value).__name__)
+            self.assertEqual(codec.decode(codec.encode(value)), value)
+
+
+class TestJsonCodecRegistry(TestCase):
+    def test_register(self):
+        registry = default_json_codecs.copy()
+        version = registry.version
+        registry.register(complex, str, complex)
+
+        self.assertGreater(registry.version, version)
+        self.assertEqual(registry.get('complex').decode('(1+2j)'), 1 + 2j)
+        self.assertIsNone(default_json_codecs.get('complex'))
+
+    def test_register_with_name(self):
+        registry = JsonCodecRegistry()
+        registry.register(int, str, int, name='Integer')
+        self.assertEqual([codec.name for codec in registry], ['Integer'])
+
+
+class TestIterJsonArray(TestCase):
+    def test_iter_json_array(self):
+        for data in [[], [1], [{'a': 'b' * 100, 'c': [1, {'d': None}]}, 12345, 'value', None]]:
+            for indent in [None, 4]:
+                for chunk_size in [1, 3, 64]:
+                    fin = StringIO(text_type(json.dumps(data, indent=indent)))
+                    values = iter_json_array(fin, chunk_size=chunk_size)
+                    self.assertEqual(list(values), data)
+
+    def test_iter_json_array_of_numbers_split_between_chunks(self):
+        data = [-15000000000.0, 1.5e-10, 0.25, -3, 12345678]
+        json_str = text_type(json.dumps(data))
+        for chunk_size in range(1, 16):
+            self.assertEqual(list(iter_json_array(StringIO(json_str), chunk_size=chunk_size)), data)
+
+    def test_iter_invalid_json_array(self):
+        for json_str in ['', '{}', '[1', '[1,]', '[1 2]']:
+            with self.assertRaises(ValueError):
+                list(iter_json_array(StringIO(json_str), chunk_size=2))
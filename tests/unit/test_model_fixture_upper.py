@@ -4,7 +4,9 @@ from future.utils import iteritems
 
 from mock import Mock
 from unittest import TestCase
+import warnings
 
+from fixtureupper.model import TableBuffer
 from fixtureupper.register import UpperRegister
 
 
@@ -70,8 +72,40 @@ class TestModelFixtureUpper(BaseTestModelFixtureUpper):
 
         a = TestModelFixture()
         b = TestNotInOrderModelFixture()
-        self.assertEqual(self.ModelFixtureUpper.sorted_fixtures_key(a), '0002_TestModelFixture')
-        self.assertEqual(self.ModelFixtureUpper.sorted_fixtures_key(b), '0004_TestNotInOrderModelFixture')
+        self.assertEqual(self.ModelFixtureUpper.sorted_fixtures_key(a), (2, 'TestModelFixture'))
+        self.assertEqual(self.ModelFixtureUpper.sorted_fixtures_key(b), (4, 'TestNotInOrderModelFixture'))
+        self.assertEqual(self.ModelFixtureUpper.get_sorted_fixtures_key()(b), (4, 'TestNotInOrderModelFixture'))
+
+    def test_model_ranks_from_dependencies(self):
+        dependencies = {'a': {'b', 'c'}, 'b': {'c', 'x'}, 'c': set(), 'd': {'d'}}
+        self.ModelFixtureUpper.get_model_dependencies = classmethod(lambda cls: dependencies)
+        self.assertEqual(self.ModelFixtureUpper.get_model_ranks(), {'c': 0, 'd': 1, 'b': 2, 'a': 3})
+
+        self.ModelFixtureUpper.all_fixtures_order = ['a']
+        self.assertEqual(self.ModelFixtureUpper.get_model_ranks(), {'a': 0, 'c': 1, 'd': 2, 'b': 3})
+
+    def test_model_ranks_with_cyclic_dependencies(self):
+        dependencies = {'a': {'b'}, 'b': {'c'}, 'c': {'a'}, 'd': set()}
+        self.ModelFixtureUpper.get_model_dependencies = classmethod(lambda cls: dependencies)
+        # Cycles are broken by name, with a warning
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            self.assertEqual(self.ModelFixtureUpper.get_model_ranks(), {'d': 0, 'a': 1, 'c': 2, 'b': 3})
+        self.assertEqual(len(caught), 1)
+        self.assertIn('Models a have cyclic dependencies', str(caught[0].message))
+        self.assertEqual(self.ModelFixtureUpper.get_cyclic_models(), {'a'})
+
+        # Optional dependencies are dropped first
+        optional = {'c': {'a'}}
+        self.ModelFixtureUpper.get_optional_model_dependencies = classmethod(lambda cls: optional)
+        self.ModelFixtureUpper.all_fixtures_order = ['d']
+        with warnings.catch_warnings(record=True):
+            warnings.simplefilter('always')
+            self.assertEqual(self.ModelFixtureUpper.get_model_ranks(), {'d': 0, 'c': 1, 'b': 2, 'a': 3})
+        self.assertEqual(self.ModelFixtureUpper.get_cyclic_models(), {'c'})
+
+        self.ModelFixtureUpper.all_fixtures_order = ['c']
+        self.assertEqual(self.ModelFixtureUpper.get_model_ranks(), {'c': 0, 'b': 1, 'd': 2, 'a': 3})
 
     def test_set_fixture_values(self):
         fixture = Mock(rel_1=None, rel_2=None, static_2=None, static_3=None, static_4='val')
@@ -106,6 +140,50 @@ class TestModelFixtureUpper(BaseTestModelFixtureUpper):
         self.assertEqual(fixture.static_1, 20)
         self.assertEqual(fixture.static_3, 4)
 
+    def test_compile_fixup_plan(self):
+        self.ModelFixtureUpper.generated_field_order = ['static_3', 'rel_1']
+        m_fu = self.ModelFixtureUpper()
+        plan = m_fu.compile_fixup_plan({
+            'rel_1': lambda *args: 5,
+            'rel_2': lambda *args: 6,
+            'rel_3': 10,
+            'static_1': 20,
+            'static_2': lambda *args: 3,
+            'static_3': lambda *args: 4,
+        })
+
+        self.assertEqual(plan.static_values, ['static_1'])
+        self.assertEqual(plan.static_relations, ['rel_3'])
+        self.assertEqual(plan.generated, [
+            ('static_3', False),
+            ('rel_1', True),
+            ('rel_2', True),
+            ('static_2', False),
+        ])
+
+    def test_fixup_plan_is_reused(self):
+        m_fu = self.ModelFixtureUpper()
+        plan = m_fu.get_fixup_plan({'static_1': 1, 'static_2': lambda *args: 2})
+        self.assertIs(m_fu.get_fixup_plan({'static_1': 3, 'static_2': lambda *args: 4}), plan)
+        self.assertIsNot(m_fu.get_fixup_plan({'static_1': 3, 'static_2': 4}), plan)
+
+    def test_fixup_plan_invalidated(self):
+        m_fu = self.ModelFixtureUpper()
+        values = {'static_1': lambda *args: 1, 'static_2': lambda *args: 2}
+        plan = m_fu.get_fixup_plan(values)
+
+        m_fu.generated_field_order = ['static_2', 'static_1']
+        new_plan = m_fu.get_fixup_plan(values)
+        self.assertIsNot(new_plan, plan)
+        self.assertEqual(new_plan.generated, [('static_2', False), ('static_1', False)])
+
+        m_fu.defaults = {}
+        self.assertIsNot(m_fu.get_fixup_plan(values), new_plan)
+
+        plan = m_fu.get_fixup_plan(values)
+        m_fu.invalidate_fixup_plans()
+        self.assertIsNot(m_fu.get_fixup_plan(values), plan)
+
 
 class TestModelFixtureUpperFixup(BaseTestModelFixtureUpper):
     def setUp(self):
@@ -192,3 +270,23 @@ class TestModelFixtureUpperFixup(BaseTestModelFixtureUpper):
         self.assertEqual(fixture.static_3, 4)
         self.assertEqual(fixture.static_4, 90)
         self.assertEqual(fixture.static_5, 80)
+
+
+class TestTableBuffer(TestCase):
+    def test_append(self):
+        buffer = TableBuffer('Model')
+        buffer.append('f1', {'a': 1})
+        buffer.append('f2', {'b': 2, 'c': 3})
+        buffer.append('f3', {'a': 4, 'c': 5})
+
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual(buffer.fixtures, ['f1', 'f2', 'f3'])
+        self.assertEqual(buffer.keys, ['a', 'b', 'c'])
+        self.assertEqual(buffer.columns, {
+            'a': [1, None, 4],
+            'b': [None, 2, None],
+            'c': [None, 3, 5],
+        })
+        self.assertEqual(list(buffer.iter_rows()), [(1, None, None), (None, 2, 3), (4, None, 5)])
+        self.assertEqual(list(buffer.iter_rows(['c', 'a'])), [(None, 1), (3, None), (5, 4)])
+        self.assertEqual(list(buffer.iter_rows([])), [(), (), ()])
@@ -0,0 +1,75 @@
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+
+from unittest import TestCase
+
+from fixtureupper.profiling import FixtureProfiler, profiled
+
+
+class Clock(object):
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        self.time += 0.5
+        return self.time
+
+
+class Upper(object):
+    _UPPER_KEY = 'Model'
+    profiler = None
+
+    @profiled('double')
+    def double(self, value):
+        return value * 2
+
+
+class TestFixtureProfiler(TestCase):
+    def setUp(self):
+        self.calls = []
+        self.profiler = FixtureProfiler(callback=lambda *args: self.calls.append(args), clock=Clock())
+
+    def test_records_calls(self):
+        timed = self.profiler.timed(Upper, 'double', lambda value: value * 2)
+        self.assertEqual(timed(2), 4)
+        self.assertEqual(timed(3), 6)
+
+        self.assertEqual(self.profiler.get_stats(), {'Model': {'double': {'calls': 2, 'time': 1.0}}})
+        self.assertEqual(self.calls, [('Model', 'double', 0.5), ('Model', 'double', 0.5)])
+
+    def test_records_failed_calls(self):
+        def fail():
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            self.profiler.call(Upper(), 'fail', fail)
+        self.assertEqual(self.profiler.get_stats(), {'Model': {'fail': {'calls': 1, 'time': 0.5}}})
+
+    def test_records_generated_attributes(self):
+        call_generator = self.profiler.timed_generator(Upper(), lambda fn, fixture, key: fn(fixture, key))
+        self.assertEqual(call_generator(lambda fixture, key: key * 2, None, 'a'), 'aa')
+        self.assertEqual(self.profiler.get_stats(), {'Model': {'generate:a': {'calls': 1, 'time': 0.5}}})
+
+    def test_get_slowest(self):
+        self.profiler.record('A', 'fast', 1.0)
+        self.profiler.record('B', 'slow', 2.0)
+        self.profiler.record('A', 'slow', 3.0)
+
+        self.assertEqual(self.profiler.get_slowest(), [
+            ('A', 'slow', 1, 3.0),
+            ('B', 'slow', 1, 2.0),
+            ('A', 'fast', 1, 1.0),
+        ])
+        self.assertEqual(self.profiler.get_slowest(1), [('A', 'slow', 1, 3.0)])
+
+        self.profiler.reset()
+        self.assertEqual(self.profiler.get_stats(), {})
+
+    def test_profiled_method(self):
+        upper = Upper()
+        self.assertEqual(upper.double(2), 4)
+        self.assertEqual(self.profiler.get_stats(), {})
+
+        upper.profiler = self.profiler
+        self.assertEqual(upper.double(2), 4)
+        self.assertEqual(self.profiler.get_stats(), {'Model': {'double': {'calls': 1, 'time': 0.5}}})
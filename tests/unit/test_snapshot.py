@@ -0,0 +1,78 @@
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+
+import datetime
+from decimal import Decimal
+import marshal
+from unittest import TestCase
+import uuid
+
+from fixtureupper.json_codecs import JsonCodecRegistry, default_json_codecs
+from fixtureupper.snapshot import FORMAT_VERSION, MAGIC, _HEADER, dumps_snapshot, loads_snapshot
+
+
+class Money(object):
+    def __init__(self, cents):
+        self.cents = cents
+
+    def __eq__(self, other):
+        return isinstance(other, Money) and other.cents == self.cents
+
+
+class TestSnapshot(TestCase):
+    def _round_trip(self, columns, codecs=default_json_codecs):
+        keys = ['c%s' % i for i in range(len(columns))]
+        data = dumps_snapshot([('Model', len(columns[0]), keys, columns)], codecs)
+        return loads_snapshot(data, codecs)[0][3]
+
+    def test_round_trips_typed_columns(self):
+        columns = [
+            [1, None, 3],
+            ['a', 'b', None],
+            [datetime.datetime(2016, 1, 2, 3, 4, 5), None, datetime.datetime(2016, 1, 2)],
+            [Decimal('1.50'), Decimal('0'), None],
+            [uuid.UUID(int=1), None, None],
+            [True, 2.5, [1, 'a']],
+        ]
+        self.assertEqual(self._round_trip(columns), columns)
+
+    def test_round_trips_mixed_columns(self):
+        columns = [[datetime.date(2016, 1, 2), datetime.datetime(2016, 1, 2, 3), Decimal('1.5'), 'x', None]]
+        decoded = self._round_trip(columns)
+        self.assertEqual(decoded, columns)
+        self.assertEqual([type(v) for v in decoded[0]], [type(v) for v in columns[0]])
+
+    def test_round_trips_custom_codec(self):
+        codecs = default_json_codecs.copy()
+        codecs.register(Money, lambda m: m.cents, Money)
+        self.assertEqual(self._round_trip([[Money(150), None]], codecs=codecs), [[Money(150), None]])
+
+        with self.assertRaises(ValueError):
+            self._round_trip([[Money(150)]])
+
+    def test_loads_only_model_names(self):
+        data = dumps_snapshot([
+            ('A', 1, ['id'], [[1]]),
+            ('B', 2, [], []),
+        ], default_json_codecs)
+        self.assertEqual(loads_snapshot(data, default_json_codecs), [
+            ('A', 1, ['id'], [[1]]),
+            ('B', 2, [], []),
+        ])
+        self.assertEqual(loads_snapshot(data, default_json_codecs, model_names={'B'}), [('B', 2, [], [])])
+
+    def test_refuses_other_versions(self):
+        data = dumps_snapshot([('A', 1, ['id'], [[1]])], default_json_codecs)
+        payload = data[len(MAGIC) + _HEADER.size:]
+
+        with self.assertRaises(ValueError):
+            loads_snapshot(b'[]', default_json_codecs)
+        with self.assertRaises(ValueError):
+            loads_snapshot(MAGIC + _HEADER.pack(FORMAT_VERSION + 1, marshal.version) + payload, default_json_codecs)
+        with self.assertRaises(ValueError):
+            loads_snapshot(MAGIC + _HEADER.pack(FORMAT_VERSION, marshal.version + 1) + payload, default_json_codecs)
+
+    def test_refuses_unknown_codecs(self):
+        data = dumps_snapshot([('A', 1, ['at'], [[datetime.date(2016, 1, 2)]])], default_json_codecs)
+        with self.assertRaises(ValueError):
+            loads_snapshot(data, JsonCodecRegistry())
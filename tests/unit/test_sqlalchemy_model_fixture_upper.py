@@ -10,6 +10,7 @@ from sqlalchemy.orm import backref, relation
 
 
 from fixtureupper.register import UpperRegister
+from fixtureupper.sqlalchemy import get_model_metadata
 
 
 @as_declarative()
@@ -115,3 +116,23 @@ class TestSetRelations(BaseTestMockFixtureUpper):
         e = E()
         self.MockFixtureUpper().set_relation(e, a, 'a')
         self.assertEqual(e.a_id, None)
+
+
+class TestModelMetadata(BaseTestMockFixtureUpper):
+    def test_metadata_is_cached(self):
+        self.assertIs(get_model_metadata(A), get_model_metadata(A(id=1)))
+        self.assertIs(self.MockFixtureUpper.get_model_metadata(), get_model_metadata(A))
+
+    def test_metadata(self):
+        metadata = get_model_metadata(A)
+        self.assertEqual(metadata.table_name, 'a')
+        self.assertEqual(metadata.primary_key, 'id')
+        self.assertEqual(metadata.column_keys, ['id', 'b_id', 'c_id', 'd_id'])
+        self.assertEqual(set(metadata.relationships), {'b', 'c', 'd', 'e'})
+        self.assertEqual(metadata.back_relations, {'b': 'a', 'c': 'a', 'd': 'a', 'e': 'a'})
+        self.assertEqual(metadata.relation_keys['b'], [{'foreign_key': 'b_id', 'related_primary_key': 'id'}])
+        self.assertEqual(metadata.relation_keys['e'], [])
+
+    def test_backref_metadata(self):
+        self.assertEqual(get_model_metadata(C).back_relations, {'a': 'c'})
+        self.assertEqual(get_model_metadata(C).relation_keys, {'a': []})